@@ -0,0 +1,213 @@
+"""Offline benchmark for the krisha parsers.
+
+Recorded result and listing pages from benchmark_fixtures/ are served by a local
+HTTP server, and every parser crawls them end to end, so fetch-engine and
+extraction changes can be compared without touching the live site.
+
+    python benchmark.py --pages 5 --repeat 200
+    python benchmark.py --backend selenium --pages 1
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import statistics
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import pandas as pd
+from selenium.webdriver.common.by import By
+
+from fetchers import HttpFetcher, LxmlDocument, SeleniumFetcher
+from krisha_parser import (
+    XPATHS,
+    AppartmentRentParser,
+    AppartmentSellParser,
+    CommerceRentParser,
+    CommerceSellParser,
+    init_driver,
+    parse_listing,
+)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_fixtures")
+
+PARSERS = {
+    "apartment_sell": AppartmentSellParser,
+    "apartment_rent": AppartmentRentParser,
+    "commerce_sell": CommerceSellParser,
+    "commerce_rent": CommerceRentParser,
+}
+
+ROUTE_PATTERN = re.compile(r"^/(?P<kind>\w+)/(?:results/|a/show/(?P<listing>\d+))")
+
+
+def load_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, f"{name}.html"), "rb") as f:
+        return f.read()
+
+
+class FixtureServer:
+    """Local stand-in for krisha.kz: /<kind>/results/?page=N and /<kind>/a/show/<id>."""
+
+    def __init__(self):
+        pages = {kind: load_fixture(kind) for kind in PARSERS}
+        results = load_fixture("results")
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                match = ROUTE_PATTERN.match(self.path)
+                if not match or match.group("kind") not in pages:
+                    self.send_error(404)
+                    return
+                kind = match.group("kind")
+                if match.group("listing"):
+                    body = pages[kind]
+                else:
+                    body = results.replace(b'href="/a/show/', f'href="/{kind}/a/show/'.encode())
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FixtureServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def results_url(self, kind: str, page: int) -> str:
+        return f"{self.base_url}/{kind}/results/?page={page}"
+
+
+def parser_fields(parser_class) -> Dict[str, List[str]]:
+    """The distinct field lookups of the parser's schema, with the locators it actually uses."""
+    return parser_class.SCHEMA.lookups
+
+
+def crawl(parser_class, kind: str, server: FixtureServer, fetcher, pages: int) -> int:
+    rows = parser_class.row_buffer()
+    for page in range(1, pages + 1):
+        document = fetcher.fetch(server.results_url(kind, page))
+        for href in document.find_all_attributes(XPATHS["CARD_LINK"], "href"):
+            link = server.base_url + href if href.startswith("/") else href
+            rows.append(parse_listing(parser_class, link, fetcher.fetch(link)))
+    rows.to_frame()
+    return len(rows)
+
+
+def field_latencies(parser_class, document, repeat: int) -> Dict[str, float]:
+    """Mean lookup time in microseconds for every field of the parser's schema."""
+    latencies = {}
+    for key, field_xpaths in parser_fields(parser_class).items():
+        locators = [(By.XPATH, xpath) for xpath in field_xpaths]
+        started = time.perf_counter()
+        for _ in range(repeat):
+            document.find_text(locators)
+        latencies[key] = (time.perf_counter() - started) / repeat * 1e6
+    return latencies
+
+
+def run(backend: str, pages: int, repeat: int, rounds: int) -> Dict[str, Dict]:
+    results = {}
+    with ExitStack() as stack:
+        server = stack.enter_context(FixtureServer())
+        driver = stack.enter_context(init_driver()) if backend == "selenium" else None
+        fetcher = SeleniumFetcher(driver) if driver else HttpFetcher(timeout=5, pool_size=4)
+        stack.callback(fetcher.close)
+        for kind, parser_class in PARSERS.items():
+            crawl(parser_class, kind, server, fetcher, 1)
+
+            timings = []
+            listings = 0
+            for _ in range(rounds):
+                started = time.perf_counter()
+                listings = crawl(parser_class, kind, server, fetcher, pages)
+                timings.append(time.perf_counter() - started)
+
+            tracemalloc.start()
+            crawl(parser_class, kind, server, fetcher, pages)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            if driver:
+                document = fetcher.fetch(f"{server.base_url}/{kind}/a/show/1000")
+            else:
+                document = LxmlDocument(kind, load_fixture(kind))
+
+            elapsed = statistics.median(timings)
+            results[parser_class.__name__] = {
+                "listings": listings,
+                "seconds": elapsed,
+                "listings_per_sec": listings / elapsed if elapsed else 0.0,
+                "peak_memory_mb": peak / 2 ** 20,
+                "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else float("nan"),
+                "field_latency_us": field_latencies(parser_class, document, repeat),
+            }
+    return results
+
+
+def print_report(results: Dict[str, Dict], backend: str) -> None:
+    summary = pd.DataFrame.from_dict(
+        {
+            name: {
+                "listings": result["listings"],
+                "listings/sec": round(result["listings_per_sec"], 1),
+                "peak MB": round(result["peak_memory_mb"], 2),
+                "max RSS MB": round(result["max_rss_mb"], 1),
+            }
+            for name, result in results.items()
+        },
+        orient="index",
+    )
+    print(f"Backend: {backend}")
+    print(summary.to_string())
+    print("peak MB: Python allocations during one crawl; max RSS MB: whole process so far, lxml and browser buffers included")
+    print()
+    latency = pd.DataFrame({name: result["field_latency_us"] for name, result in results.items()}).round(1)
+    print("Per-field lookup latency, us (blank: not used by the parser)")
+    print(latency.to_string(na_rep=""))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    arg_parser = argparse.ArgumentParser(description="Offline benchmark for the krisha parsers")
+    arg_parser.add_argument("--backend", choices=["http", "selenium"], default="http")
+    arg_parser.add_argument("--pages", type=int, default=5, help="result pages per parser (20 listings each)")
+    arg_parser.add_argument("--rounds", type=int, default=3, help="timed crawls per parser, the median is reported")
+    arg_parser.add_argument("--repeat", type=int, default=200, help="lookups per schema field for field latency")
+    arg_parser.add_argument("--json", dest="json_path", help="also write the raw results to this file")
+    args = arg_parser.parse_args(argv)
+
+    logging.disable(logging.ERROR)
+    results = run(args.backend, args.pages, args.repeat, args.rounds)
+    print_report(results, args.backend)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"backend": args.backend, "pages": args.pages, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
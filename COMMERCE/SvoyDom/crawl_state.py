@@ -0,0 +1,214 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+
+logger = logging.getLogger(__name__)
+
+LISTING_ID_PATTERN = re.compile(r"/a/show/(\d+)")
+
+
+def listing_id(url: str) -> str:
+    match = LISTING_ID_PATTERN.search(url)
+    return match.group(1) if match else url
+
+
+def fingerprint(*parts: Optional[str]) -> str:
+    """Short hash of the card-level fields (price, date) used to spot changed listings."""
+    joined = "|".join(" ".join(str(part).split()) if part else "" for part in parts)
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()[:16]
+
+
+class CrawlState:
+    """SQLite record of finished result pages and written listings, so an interrupted crawl can resume.
+
+    Listings and pages are staged in memory and only persisted by commit(), which
+    callers run right after the rows have been written to the output. A crash
+    therefore never marks a listing as done that is missing from the output.
+    The listing index is also kept in a dict, so lookups stay O(1) for large crawls.
+
+    A listing that shows up on several result pages (pagination shifts while new
+    ads are posted) is parsed once, and every one of those pages waits for it
+    before it counts as done.
+
+    In incremental mode each listing also stores the fingerprint of its result-page
+    card, and a listing seen in an earlier run is parsed again only when that
+    fingerprint has changed.
+    """
+
+    def __init__(self, path: str, crawl: str, incremental: bool = False):
+        self.path = path
+        self.crawl = crawl
+        self.incremental = incremental
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages (crawl TEXT, page INTEGER, done_at REAL, PRIMARY KEY (crawl, page))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS listings (crawl TEXT, listing_id TEXT, url TEXT, parsed_at REAL, fingerprint TEXT, PRIMARY KEY (crawl, listing_id))"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(listings)")}
+        if "fingerprint" not in columns:
+            self.conn.execute("ALTER TABLE listings ADD COLUMN fingerprint TEXT")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs (crawl TEXT, started_at REAL, finished_at REAL)"
+        )
+        self.conn.commit()
+
+        self.done_pages: Set[int] = {
+            row[0] for row in self.conn.execute("SELECT page FROM pages WHERE crawl = ?", (crawl,))
+        }
+        self.parsed: Dict[str, Optional[str]] = {
+            row[0]: row[1] for row in self.conn.execute("SELECT listing_id, fingerprint FROM listings WHERE crawl = ?", (crawl,))
+        }
+        self.pending_listings: Dict[str, str] = {}
+        self.pending_pages: Set[int] = set()
+        self.page_links: Dict[int, Set[str]] = {}
+        self.link_pages: Dict[str, Set[int]] = {}
+        self.listing_pages: Dict[str, Set[int]] = {}
+        self.failed_pages: Set[int] = set()
+        self.card_fingerprints: Dict[str, str] = {}
+        logger.info(f"Crawl state {crawl}: {len(self.done_pages)} pages and {len(self.parsed)} listings already done")
+
+    def begin_run(self) -> bool:
+        """Resume the last run if it never finished, otherwise start a new one. Returns True when resuming."""
+        with self.lock:
+            last = self.conn.execute(
+                "SELECT rowid, finished_at FROM runs WHERE crawl = ? ORDER BY rowid DESC LIMIT 1", (self.crawl,)
+            ).fetchone()
+            if last and last[1] is None:
+                logger.info(f"Resuming unfinished crawl {self.crawl}")
+                return True
+            with self.conn:
+                self.conn.execute("DELETE FROM pages WHERE crawl = ?", (self.crawl,))
+                self.conn.execute("INSERT INTO runs (crawl, started_at) VALUES (?, ?)", (self.crawl, time.time()))
+            self.done_pages.clear()
+            return False
+
+    def finish_run(self) -> None:
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE runs SET finished_at = ? WHERE rowid = (SELECT MAX(rowid) FROM runs WHERE crawl = ?)",
+                    (time.time(), self.crawl),
+                )
+
+    def reset(self) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM pages WHERE crawl = ?", (self.crawl,))
+            self.conn.execute("DELETE FROM listings WHERE crawl = ?", (self.crawl,))
+            self.conn.execute("DELETE FROM runs WHERE crawl = ?", (self.crawl,))
+            self.conn.commit()
+            self.done_pages.clear()
+            self.parsed.clear()
+            self.pending_listings.clear()
+            self.pending_pages.clear()
+            self.page_links.clear()
+            self.link_pages.clear()
+            self.listing_pages.clear()
+            self.failed_pages.clear()
+            self.card_fingerprints.clear()
+
+    def is_page_done(self, page: int) -> bool:
+        return page in self.done_pages
+
+    def is_parsed(self, url: str) -> bool:
+        key = listing_id(url)
+        return key in self.parsed or key in self.pending_listings or key in self.link_pages
+
+    def needs_parse(self, url: str, card_fingerprint: Optional[str] = None) -> bool:
+        key = listing_id(url)
+        if key in self.pending_listings or key in self.link_pages:
+            return False
+        if key not in self.parsed:
+            return True
+        return self.incremental and card_fingerprint is not None and self.parsed[key] != card_fingerprint
+
+    def add_page(self, page: int, links: Iterable[str], fingerprints: Optional[Dict[str, str]] = None) -> List[str]:
+        """Register a result page and return the links on it that still need parsing.
+
+        Links already queued from an earlier page are not returned again; the page
+        just waits for them as well.
+        """
+        fingerprints = fingerprints or {}
+        with self.lock:
+            outstanding = []
+            keys = set()
+            for link in links:
+                key = listing_id(link)
+                if key in keys:
+                    continue
+                if key in self.link_pages:
+                    keys.add(key)
+                elif key in self.pending_listings:
+                    self.listing_pages.setdefault(key, set()).add(page)
+                elif self.needs_parse(link, fingerprints.get(link)):
+                    outstanding.append(link)
+                    keys.add(key)
+                    if link in fingerprints:
+                        self.card_fingerprints[key] = fingerprints[link]
+            if keys:
+                self.page_links[page] = keys
+                for key in keys:
+                    self.link_pages.setdefault(key, set()).add(page)
+            else:
+                self.pending_pages.add(page)
+            return outstanding
+
+    def add_listing(self, url: str) -> None:
+        with self.lock:
+            key = listing_id(url)
+            self.pending_listings[key] = url
+            pages = self.link_pages.pop(key, set())
+            self.listing_pages[key] = pages
+            for page in pages:
+                keys = self.page_links[page]
+                keys.discard(key)
+                if not keys:
+                    del self.page_links[page]
+                    if page not in self.failed_pages:
+                        self.pending_pages.add(page)
+
+    def rollback(self) -> None:
+        """Forget the staged listings after their batch failed to reach the output.
+
+        They are not marked as parsed, so a resumed crawl fetches them again, and
+        none of their result pages is marked done in this run.
+        """
+        with self.lock:
+            for key in self.pending_listings:
+                self.failed_pages.update(self.listing_pages.pop(key, ()))
+                self.card_fingerprints.pop(key, None)
+            self.pending_pages -= self.failed_pages
+            self.pending_listings.clear()
+
+    def commit(self) -> None:
+        with self.lock:
+            if not self.pending_listings and not self.pending_pages:
+                return
+            now = time.time()
+            fingerprints = {key: self.card_fingerprints.pop(key, self.parsed.get(key)) for key in self.pending_listings}
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO listings (crawl, listing_id, url, parsed_at, fingerprint) VALUES (?, ?, ?, ?, ?)",
+                    [(self.crawl, key, url, now, fingerprints[key]) for key, url in self.pending_listings.items()],
+                )
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO pages (crawl, page, done_at) VALUES (?, ?, ?)",
+                    [(self.crawl, page, now) for page in self.pending_pages],
+                )
+            self.parsed.update(fingerprints)
+            self.done_pages.update(self.pending_pages)
+            for key in self.pending_listings:
+                self.listing_pages.pop(key, None)
+            self.pending_listings.clear()
+            self.pending_pages.clear()
+
+    def close(self) -> None:
+        self.conn.close()
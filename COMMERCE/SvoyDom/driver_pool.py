@@ -0,0 +1,257 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+
+logger = logging.getLogger(__name__)
+
+
+def browser_memory(driver: "webdriver.Chrome") -> int:
+    """Resident memory of chromedriver and every Chrome process under it, in bytes (0 if unknown)."""
+    import psutil
+    try:
+        service = psutil.Process(driver.service.process.pid)
+        return sum(process.memory_info().rss for process in [service, *service.children(recursive=True)])
+    except (AttributeError, psutil.Error):
+        return 0
+
+
+def lock_profile(profile: str) -> bool:
+    """Claim a Chrome profile directory for this process via `<profile>.lock`; False if a live process holds it."""
+    lock_file = f"{profile}.lock"
+    for _ in range(2):
+        try:
+            fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(lock_file, encoding="utf-8") as f:
+                    owner = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                owner = 0
+            if owner and process_alive(owner):
+                return False
+            logger.info(f"Removing stale browser profile lock {lock_file}")
+            try:
+                os.remove(lock_file)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+        os.makedirs(profile, exist_ok=True)
+        return True
+    return False
+
+
+def process_alive(pid: int) -> bool:
+    import psutil
+    return pid == os.getpid() or psutil.pid_exists(pid)
+
+
+class DriverSession:
+    def __init__(self, driver: "webdriver.Chrome", profile: Optional[str], latency_window: int = 20):
+        self.driver = driver
+        self.profile = profile
+        self.pages = 0
+        self.memory_checked = 0
+        self.started = time.monotonic()
+        self.loads = deque(maxlen=latency_window)
+
+
+class DriverPool:
+    """Warm Chrome sessions handed out to crawls and taken back instead of quitting.
+
+    Up to `size` browsers are started on demand by `start(profile)` and reused by
+    later categories of the same run. With `profile_dir`, each slot keeps its own
+    Chrome profile there, so cookies and the browser cache also survive between
+    runs. Slots are locked per process, so parallel runs sharing `profile_dir`
+    take the next free `session-N` instead of a profile Chrome already has open.
+
+    The pool is also the browsers' watchdog: a session is replaced once it has
+    loaded `max_pages` pages (only real browser loads reported to observe_load
+    count, not listings fetched over HTTP), its processes use more than `max_memory` bytes, or
+    its last `latency_window` page loads took `max_latency` seconds on average.
+    Every replacement is counted in `metrics` by reason.
+    """
+
+    MEMORY_CHECK_EVERY = 20
+
+    def __init__(self, start: Callable[[Optional[str]], "webdriver.Chrome"], size: int = 1, profile_dir: Optional[str] = None,
+                 max_pages: int = 500, max_memory: Optional[int] = None, max_latency: Optional[float] = None,
+                 latency_window: int = 20, metrics=None):
+        self.start = start
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory = max_memory
+        self.max_latency = max_latency
+        self.latency_window = latency_window
+        self.metrics = metrics
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(size)
+        self.idle: List[DriverSession] = []
+        self.sessions: Dict[int, DriverSession] = {}
+        self.profiles: List[Optional[str]] = [None] * size
+        self.locked: List[str] = []
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+            slot = 0
+            while len(self.locked) < size:
+                slot += 1
+                profile = os.path.abspath(os.path.join(profile_dir, f"session-{slot}"))
+                if lock_profile(profile):
+                    self.locked.append(profile)
+            self.profiles = list(self.locked)
+
+    def __enter__(self) -> "DriverPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _launch(self, profile: Optional[str]) -> "webdriver.Chrome":
+        started = time.perf_counter()
+        driver = self.start(profile)
+        logger.info(f"Browser session started in {time.perf_counter() - started:.1f}s" + (f" with profile {profile}" if profile else ""))
+        return driver
+
+    def _start(self, profile: Optional[str]) -> DriverSession:
+        try:
+            driver = self._launch(profile)
+        except Exception:
+            with self.lock:
+                self.profiles.append(profile)
+            raise
+        session = DriverSession(driver, profile, self.latency_window)
+        with self.lock:
+            self.sessions[id(driver)] = session
+        return session
+
+    @staticmethod
+    def _close_driver(driver: "webdriver.Chrome") -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.error(f"Error closing browser session: {e}")
+
+    def _quit(self, session: DriverSession) -> None:
+        with self.lock:
+            self.sessions.pop(id(session.driver), None)
+        self._close_driver(session.driver)
+        with self.lock:
+            self.profiles.append(session.profile)
+
+    def acquire(self) -> "webdriver.Chrome":
+        self.slots.acquire()
+        with self.lock:
+            if self.idle:
+                session = self.idle.pop()
+                logger.info(f"Reusing warm browser session ({session.pages} pages so far)")
+                return session.driver
+            profile = self.profiles.pop(0)
+        try:
+            return self._start(profile).driver
+        except Exception:
+            self.slots.release()
+            raise
+
+    def _count(self, reason: str) -> None:
+        if self.metrics is not None:
+            self.metrics.record_recycle(reason)
+
+    def release(self, driver: "webdriver.Chrome", broken: bool = False) -> None:
+        session = self.sessions.get(id(driver))
+        if session is not None:
+            reason = "broken" if broken else self.recycle_reason(driver, check_memory=True)
+            if reason:
+                logger.info(f"Retiring browser session after {session.pages} pages: {reason}")
+                self._count(reason)
+                self._quit(session)
+            else:
+                with self.lock:
+                    self.idle.append(session)
+        self.slots.release()
+
+    @contextmanager
+    def session(self):
+        driver = self.acquire()
+        session = self.sessions[id(driver)]
+        try:
+            yield driver
+        except Exception:
+            self.release(session.driver, broken=True)
+            raise
+        except BaseException:
+            self.release(session.driver)
+            raise
+        self.release(session.driver)
+
+    def observe_load(self, driver: "webdriver.Chrome", seconds: float) -> None:
+        """Count one page the browser actually loaded, and how long it took."""
+        session = self.sessions.get(id(driver))
+        if session is not None:
+            session.pages += 1
+            session.loads.append(seconds)
+
+    def recycle_reason(self, driver: "webdriver.Chrome", check_memory: bool = False) -> Optional[str]:
+        """Why the session should be replaced, or None; memory is sampled every MEMORY_CHECK_EVERY loaded pages or when asked."""
+        session = self.sessions.get(id(driver))
+        if session is None:
+            return None
+        if session.pages >= self.max_pages:
+            return "max pages"
+        if self.max_memory and (check_memory or session.pages - session.memory_checked >= self.MEMORY_CHECK_EVERY):
+            session.memory_checked = session.pages
+            memory = browser_memory(driver)
+            if memory > self.max_memory:
+                logger.info(f"Browser session uses {memory / 2 ** 20:.0f} MB after {session.pages} pages")
+                return "memory"
+        if self.max_latency and len(session.loads) == session.loads.maxlen:
+            latency = sum(session.loads) / len(session.loads)
+            if latency > self.max_latency:
+                logger.info(f"Browser pages took {latency:.1f}s on average over the last {len(session.loads)} loads")
+                return "slow pages"
+        return None
+
+    def recycle(self, driver: "webdriver.Chrome", reason: str = "requested") -> "webdriver.Chrome":
+        """Quit `driver` and return a fresh browser on the same profile and slot; session() releases the new one."""
+        with self.lock:
+            session = self.sessions.pop(id(driver), None)
+        if session is None:
+            return driver
+        logger.warning(f"Restarting browser session after {session.pages} pages: {reason}")
+        self._count(reason)
+        self._close_driver(driver)
+        try:
+            session.driver = self._launch(session.profile)
+        except Exception:
+            with self.lock:
+                self.profiles.append(session.profile)
+            raise
+        session.pages = 0
+        session.memory_checked = 0
+        session.started = time.monotonic()
+        session.loads.clear()
+        with self.lock:
+            self.sessions[id(session.driver)] = session
+        return session.driver
+
+    def close(self) -> None:
+        with self.lock:
+            sessions, self.idle = list(self.sessions.values()), []
+        for session in sessions:
+            self._quit(session)
+        if sessions:
+            logger.info(f"Closed {len(sessions)} browser sessions")
+        for profile in self.locked:
+            try:
+                os.remove(f"{profile}.lock")
+            except OSError as e:
+                logger.error(f"Could not release browser profile lock for {profile}: {e}")
+        self.locked = []
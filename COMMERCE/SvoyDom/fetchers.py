@@ -0,0 +1,307 @@
+import logging
+import sys
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from lxml import etree, html as lxml_html
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+
+logger = logging.getLogger(__name__)
+
+# selenium's By.XPATH, spelled out so that parsing downloaded pages does not load the webdriver package
+XPATH = "xpath"
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/128.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8",
+}
+
+CAPTCHA_MARKERS = ("captcha", "are you a robot", "подтвердите, что вы не робот")
+
+_COMPILED_XPATHS: Dict[str, etree.XPath] = {}
+
+FIND_MANY_SCRIPT = """
+const fields = arguments[0];
+const found = {};
+for (const [field, xpaths] of Object.entries(fields)) {
+    const result = {text: null, index: null, timings: []};
+    for (let i = 0; i < xpaths.length; i++) {
+        const started = performance.now();
+        const node = document.evaluate(
+            xpaths[i], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+        result.timings.push((performance.now() - started) / 1000);
+        if (node) {
+            result.text = (node.innerText || node.textContent || "").trim();
+            result.index = i;
+            break;
+        }
+    }
+    found[field] = result;
+}
+return found;
+"""
+
+
+def browser_get(driver: "webdriver.Chrome", url: str, limiter=None, watchdog=None) -> None:
+    """driver.get() paced by the shared limiter, reporting load time and captcha pages back to it (and load time to the watchdog)."""
+    if limiter:
+        limiter.acquire()
+    started = time.perf_counter()
+    driver.get(url)
+    elapsed = time.perf_counter() - started
+    if limiter:
+        limiter.record(elapsed, blocked=looks_blocked(driver.current_url, driver.title))
+    if watchdog:
+        watchdog.observe_load(driver, elapsed)
+
+
+def is_browser_failure(error: Exception) -> bool:
+    """Errors that mean the browser itself is stuck or gone (page-load timeout, crashed tab, dead session), not a parsing problem."""
+    # a Selenium error can only come from a browser, and starting one imports selenium
+    if "selenium" not in sys.modules:
+        return False
+    from selenium.common.exceptions import InvalidSessionIdException, NoSuchWindowException, TimeoutException, WebDriverException
+    return isinstance(error, (TimeoutException, InvalidSessionIdException, NoSuchWindowException)) or type(error) is WebDriverException
+
+
+def wait_until_ready(driver: "webdriver.Chrome", ready_xpath: Optional[str] = None, timeout: float = 5) -> bool:
+    """Single readiness gate for a freshly loaded page.
+
+    Waits until `ready_xpath` is present or the document has finished loading,
+    whichever comes first, so a page missing the element does not burn the whole
+    timeout. Returns True when the page has the element (or, without one, is parsed).
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    def ready(driver):
+        if ready_xpath and driver.find_elements(XPATH, ready_xpath):
+            return True
+        state = driver.execute_script("return document.readyState")
+        if ready_xpath:
+            return state == "complete"
+        return state in ("interactive", "complete")
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(ready)
+    except TimeoutException:
+        logger.warning(f"Page {driver.current_url} not ready after {timeout}s")
+        return False
+    return not ready_xpath or bool(driver.find_elements(XPATH, ready_xpath))
+
+
+def looks_blocked(url: str, source: str = "") -> bool:
+    """Captcha or anti-bot interstitial instead of the requested page.
+
+    Real listing pages are large and may mention a captcha in a contact form, so
+    only a small page with a marker (or a captcha URL) counts.
+    """
+    if "captcha" in url.lower():
+        return True
+    if len(source) > 20000:
+        return False
+    text = source.lower()
+    return any(marker in text for marker in CAPTCHA_MARKERS)
+
+
+def block_resources(driver: "webdriver.Chrome", patterns: List[str]) -> None:
+    """Have Chrome drop requests matching any of the URL patterns (``*`` wildcards) before they are sent."""
+    if not patterns:
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    logger.info(f"Blocking {len(patterns)} resource patterns")
+
+
+def compile_xpath(xpath: str) -> etree.XPath:
+    compiled = _COMPILED_XPATHS.get(xpath)
+    if compiled is None:
+        compiled = _COMPILED_XPATHS[xpath] = etree.XPath(xpath)
+    return compiled
+
+
+def node_text(node) -> str:
+    if isinstance(node, str):
+        return node.strip()
+    return " ".join(node.text_content().split())
+
+
+class LxmlDocument:
+    """Listing page downloaded once and parsed into an in-memory lxml tree."""
+
+    def __init__(self, url: str, source: str):
+        self.url = url
+        self.tree = lxml_html.fromstring(source)
+
+    def find_text(self, locators: List[Tuple[str, str]], timeout: float = 0) -> Optional[str]:
+        for by, xpath in locators:
+            if by != XPATH:
+                raise ValueError(f"Unsupported locator for lxml backend: {by}")
+            nodes = compile_xpath(xpath)(self.tree)
+            if nodes:
+                return node_text(nodes[0])
+            logger.debug(f"Element not found with locator: {(by, xpath)}")
+        return None
+
+    def find_many(self, fields: Dict[str, List[str]], metrics=None) -> Dict[str, Optional[str]]:
+        found = {}
+        for field, xpaths in fields.items():
+            found[field] = None
+            matched = None
+            timings = []
+            for index, xpath in enumerate(xpaths):
+                started = time.perf_counter()
+                nodes = compile_xpath(xpath)(self.tree)
+                timings.append(time.perf_counter() - started)
+                if nodes:
+                    found[field] = node_text(nodes[0])
+                    matched = index
+                    break
+            if metrics is not None:
+                metrics.observe(field, xpaths, timings, matched)
+        return found
+
+    def find_all_attributes(self, xpath: str, attribute: str) -> List[str]:
+        return [node.get(attribute) for node in compile_xpath(xpath)(self.tree) if node.get(attribute)]
+
+
+class SeleniumDocument:
+    """Page currently loaded in a WebDriver; every lookup is a browser round trip."""
+
+    def __init__(self, driver: "webdriver.Chrome"):
+        self.driver = driver
+        self.url = driver.current_url
+
+    def find_text(self, locators: List[Tuple[str, str]], timeout: float = 0) -> Optional[str]:
+        from selenium.common.exceptions import NoSuchElementException, TimeoutException
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        for by, xpath in locators:
+            if timeout <= 0:
+                elements = self.driver.find_elements(by, xpath)
+                if elements:
+                    return elements[0].text.strip()
+                logger.debug(f"Element not found with locator: {(by, xpath)}")
+                continue
+            try:
+                element = WebDriverWait(self.driver, timeout).until(
+                    EC.presence_of_element_located((by, xpath))
+                )
+                return element.text.strip()
+            except (TimeoutException, NoSuchElementException):
+                logger.debug(f"Element not found with locator: {(by, xpath)}")
+                continue
+        return None
+
+    def find_many(self, fields: Dict[str, List[str]], metrics=None) -> Dict[str, Optional[str]]:
+        if not fields:
+            return {}
+        results = self.driver.execute_script(FIND_MANY_SCRIPT, fields)
+        if metrics is not None:
+            for field, result in results.items():
+                metrics.observe(field, fields[field], result["timings"], result["index"])
+        return {field: result["text"] for field, result in results.items()}
+
+    def find_all_attributes(self, xpath: str, attribute: str) -> List[str]:
+        elements = self.driver.find_elements(XPATH, xpath)
+        return [value for value in (element.get_attribute(attribute) for element in elements) if value]
+
+
+class HttpFetcher:
+    """Downloads pages over a pooled keep-alive session, no browser involved.
+
+    With a PageCache, fresh cached pages are served without a request and every
+    download is stored; an offline cache never touches the network.
+    """
+
+    def __init__(self, timeout: float = 10, pool_size: int = 10, headers: Optional[Dict[str, str]] = None, limiter=None, cache=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.timeout = timeout
+        self.limiter = limiter
+        self.cache = cache
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+
+    def get(self, url: str) -> str:
+        if self.cache:
+            source = self.cache.get(url)
+            if source is not None:
+                return source
+        if self.limiter:
+            self.limiter.acquire()
+        started = time.perf_counter()
+        response = self.session.get(url, timeout=self.timeout)
+        blocked = looks_blocked(response.url, response.text)
+        if self.limiter:
+            self.limiter.record(time.perf_counter() - started, response.status_code, blocked)
+        response.raise_for_status()
+        if self.cache and not blocked:
+            self.cache.put(url, response.text)
+        return response.text
+
+    def fetch(self, url: str) -> LxmlDocument:
+        return LxmlDocument(url, self.get(url))
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class SeleniumFetcher:
+    """Loads pages in a real browser, for pages that need JavaScript.
+
+    Each page passes one readiness gate (wait_until_ready) and every lookup after
+    that is immediate; the driver's implicit wait is turned off so it cannot stack
+    on top of explicit waits.
+    """
+
+    def __init__(self, driver: "webdriver.Chrome", ready_xpath: Optional[str] = None, ready_timeout: float = 5, limiter=None, watchdog=None):
+        self.driver = driver
+        self.ready_xpath = ready_xpath
+        self.ready_timeout = ready_timeout
+        self.limiter = limiter
+        self.watchdog = watchdog
+        driver.implicitly_wait(0)
+
+    def fetch(self, url: str) -> SeleniumDocument:
+        browser_get(self.driver, url, self.limiter, self.watchdog)
+        wait_until_ready(self.driver, self.ready_xpath, self.ready_timeout)
+        return SeleniumDocument(self.driver)
+
+    def close(self) -> None:
+        pass
+
+
+class FallbackFetcher:
+    """Tries the primary backend and falls back when the page came back without the expected markup."""
+
+    def __init__(self, primary, fallback, ready_xpath: str):
+        self.primary = primary
+        self.fallback = fallback
+        self.ready_xpath = ready_xpath
+
+    def fetch(self, url: str):
+        import requests
+        try:
+            document = self.primary.fetch(url)
+            if document.find_text([(XPATH, self.ready_xpath)]) is not None:
+                return document
+            logger.warning(f"Page {url} is missing expected markup, falling back to {type(self.fallback).__name__}")
+        except (requests.RequestException, etree.ParserError) as e:
+            logger.warning(f"{type(self.primary).__name__} failed for {url}: {e}, falling back")
+        return self.fallback.fetch(url)
+
+    def close(self) -> None:
+        self.primary.close()
+        self.fallback.close()
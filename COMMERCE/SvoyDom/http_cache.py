@@ -0,0 +1,139 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a page was never cached."""
+
+
+def page_kind(url: str) -> str:
+    return "listing" if "/a/show/" in url else "results"
+
+
+class PageCache:
+    """Compressed on-disk cache of fetched HTML, keyed by URL, with per-kind TTL and LRU eviction.
+
+    Pages live under `path` as zlib files named by the SHA-256 of the URL; a small
+    SQLite index keeps their kind, fetch time, size and last access. When the total
+    size passes `max_bytes`, the least recently used pages are evicted.
+
+    In offline mode TTLs are ignored and nothing is ever downloaded: a page that is
+    not in the cache raises CacheMiss.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl: Dict[str, float], offline: bool = False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.offline = offline
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(path, "index.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, url TEXT, kind TEXT, fetched_at REAL, accessed_at REAL, size INTEGER)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+        self.conn.commit()
+        self.total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], f"{key}.html.z")
+
+    def get(self, url: str) -> Optional[str]:
+        key = self.key(url)
+        with self.lock:
+            row = self.conn.execute("SELECT kind, fetched_at FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is not None and not self.offline and time.time() - row[1] > self.ttl.get(row[0], 0):
+                row = None
+            if row is not None:
+                try:
+                    with open(self._file(key), "rb") as f:
+                        source = zlib.decompress(f.read()).decode("utf-8")
+                except (OSError, zlib.error) as e:
+                    logger.warning(f"Dropping unreadable cache entry for {url}: {e}")
+                    self._delete(key)
+                    source = None
+                if source is not None:
+                    with self.conn:
+                        self.conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                    self.hits += 1
+                    return source
+            self.misses += 1
+        if self.offline:
+            raise CacheMiss(f"Page not cached: {url}")
+        return None
+
+    def put(self, url: str, source: str) -> None:
+        if self.offline:
+            return
+        key = self.key(url)
+        data = zlib.compress(source.encode("utf-8"), 6)
+        file = self._file(key)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        tmp_file = f"{file}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file, file)
+        now = time.time()
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM pages WHERE key = ?", (key,)).fetchone()
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pages (key, url, kind, fetched_at, accessed_at, size) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, url, page_kind(url), now, now, len(data)),
+                )
+            self.total += len(data) - (old[0] if old else 0)
+            if self.total > self.max_bytes:
+                self._evict()
+
+    def _delete(self, key: str) -> None:
+        row = self.conn.execute("SELECT size FROM pages WHERE key = ?", (key,)).fetchone()
+        with self.conn:
+            self.conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+        if row:
+            self.total -= row[0]
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for key, size in self.conn.execute("SELECT key, size FROM pages ORDER BY accessed_at").fetchall():
+            if self.total <= target:
+                break
+            try:
+                os.remove(self._file(key))
+            except OSError:
+                pass
+            self.conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+            self.total -= size
+            evicted += 1
+        self.conn.commit()
+        logger.info(f"Evicted {evicted} cached pages, cache is now {self.total / 2 ** 20:.1f} MB")
+
+    def describe(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return f"{self.hits}/{lookups} cache hits ({rate:.0%}), {self.total / 2 ** 20:.1f} MB on disk"
+
+    def close(self) -> None:
+        self.conn.close()
@@ -1,33 +1,55 @@
+"""krisha.kz listing parser.
+
+Importing this module only loads the standard library, lxml and the small
+helper modules; pandas/numpy are imported by the batch cleaning functions and
+the sinks, Selenium when a browser is started, and asyncio/aiohttp by the async
+crawl. Logging is configured by main(), so importing it never creates scraper.log.
+"""
 from enum import Enum
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 import time
 import re
 import logging
-import random
-import pandas as pd
-from abc import ABC, abstractmethod
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from contextlib import contextmanager
+import argparse
+import json
+import queue
+import threading
+from abc import ABC
+from contextlib import contextmanager, nullcontext
+from functools import partial
 import os
 
-import urllib
+from fetchers import DEFAULT_HEADERS, FallbackFetcher, HttpFetcher, LxmlDocument, SeleniumFetcher, block_resources, browser_get, compile_xpath, is_browser_failure, looks_blocked, node_text, wait_until_ready
+from rate_limit import AdaptiveRateLimiter, RateLimiter
+from crawl_state import CrawlState, fingerprint
+from metrics import ExtractionMetrics
+from locator_order import LocatorOrder
+from http_cache import CacheMiss, PageCache
+from driver_pool import DriverPool
+from sinks import CsvSink, DatabaseSink, ParquetSink, StreamingWriter
+from schema import FieldSchema, batch_column, column
+from records import ApartmentRentRecord, ApartmentSellRecord, CommerceRentRecord, CommerceSellRecord, RowBuffer
+
+import urllib.parse
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from selenium import webdriver
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("scraper.log", encoding="utf-8"),
-        logging.StreamHandler(),
-    ],
-)
 logger = logging.getLogger(__name__)
 
+def configure_logging(log_file: str = "scraper.log") -> None:
+    """Log to `log_file` and the console; called by the entry points, never on import."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler(log_file, encoding="utf-8"),
+            logging.StreamHandler(),
+        ],
+    )
+
 CONFIG = {
     "BASE_URLS": {
         ("sell", "1"): "https://krisha.kz/prodazha/kvartiry/?",
@@ -37,10 +59,43 @@ CONFIG = {
     },
     "OUTPUT_ENCODING": "utf-16",
     "OUTPUT_SEPARATOR": "[",
+    "OUTPUT_FORMAT": "csv",
+    "OUTPUT_DB": None,
+    "FLUSH_MAX_BYTES": 8 * 2 ** 20,
     "MAX_PAGES": 1000,
+    "SAVE_COUNT": 100,
     "SITE_URL": "https://krisha.kz/",
     "TIMEOUT": 0.5,
-    "AVG_NUM_OF_ADS": 20
+    "PAGE_READY_TIMEOUT": 5,
+    "PAGE_LOAD_STRATEGY": "eager",
+    "HEADLESS": True,
+    "BLOCK_PROFILE": "lean",
+    "BROWSER_PROFILE_DIR": "chrome_profiles",
+    "BROWSER_MAX_PAGES": 500,
+    "BROWSER_MAX_MEMORY_MB": 1500,
+    "BROWSER_MAX_LOAD_SECONDS": 15,
+    "PAGE_LOAD_TIMEOUT": 30,
+    "AVG_NUM_OF_ADS": 20,
+    "FETCH_BACKEND": "http",
+    "HTTP_TIMEOUT": 10,
+    "HTTP_POOL_SIZE": 10,
+    "WORKERS": 1,
+    "RATE_LIMIT": 1.0,
+    "RATE_LIMIT_MIN": 0.2,
+    "RATE_LIMIT_MAX": 5.0,
+    "SLOW_RESPONSE": 3.0,
+    "CACHE_DIR": None,
+    "CACHE_MAX_MB": 500,
+    "CACHE_TTL": {"results": 15 * 60, "listing": 7 * 24 * 3600},
+    "OFFLINE": False,
+    "CRAWL_MODE": "browser",
+    "ASYNC_CONCURRENCY": 8,
+    "PREFETCH_PAGES": 2,
+    "STATE_DB": "crawl_state.sqlite",
+    "RESUME": True,
+    "INCREMENTAL": False,
+    "METRICS_FILE": None,
+    "LOCATOR_ORDER_FILE": "locator_order.json",
 }
 
 XPATHS = {
@@ -113,10 +168,127 @@ XPATHS = {
         "//dt[@data-name='indust.max_electr']/following-sibling::dd",
         "//div[@data-name='indust.max_electr']/div[@class='offer__advert-short-info']",
     ],
+    "CARD_LINK": "//div[contains(@class, 'a-card__header-left')]/descendant::a[1]",
+    "CARD": "//div[contains(concat(' ', normalize-space(@class), ' '), ' a-card ')]",
+    "CARD_HREF": ".//div[contains(@class, 'a-card__header-left')]/descendant::a[1]/@href",
+    "CARD_PRICE": ".//div[contains(@class, 'a-card__price')]",
+    "CARD_DATE": ".//div[contains(@class, 'a-card__stats-item')]",
     "SEARCH_BUTTON": "//button[contains(text(), 'Найти')]",
     "CATEGORY_SELECT": "//div[@class='search-element-wrap categories-for-sell']/div[@class='element-select']/select",
 }
 
+# URL patterns Chrome drops before sending. Stylesheets and scripts stay: parsers read
+# innerText, which depends on CSS visibility, and some listing blocks are rendered by JS.
+BLOCKED_RESOURCES = {
+    "images": ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.bmp"],
+    "fonts": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "video": ["*.mp4", "*.webm", "*.m3u8", "*.ts", "*.mov"],
+    "maps": [
+        "*api-maps.yandex.ru*", "*core-renderer-tiles.maps.yandex.net*", "*static-maps.yandex.ru*",
+        "*maps.googleapis.com*", "*maps.gstatic.com*", "*tile.openstreetmap.org*", "*2gis.com*",
+    ],
+    "analytics": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+        "*mc.yandex.ru*", "*an.yandex.ru*", "*yandex.ru/ads*", "*connect.facebook.net*", "*facebook.com/tr*",
+        "*top-fwz1.mail.ru*", "*vk.com/rtrg*", "*hotjar.com*", "*criteo.com*", "*adriver.ru*",
+    ],
+}
+
+BLOCK_PROFILES = {
+    "none": [],
+    "lean": ["images", "fonts", "video", "maps", "analytics"],
+    "analytics": ["analytics"],
+}
+
+def blocked_patterns(profile: str) -> List[str]:
+    if profile not in BLOCK_PROFILES:
+        raise ValueError(f"Unknown block profile: {profile}")
+    return [pattern for group in BLOCK_PROFILES[profile] for pattern in BLOCKED_RESOURCES[group]]
+
+AREA_PATTERN = re.compile(r"(\d+\.?\d*)")
+FLOOR_PATTERN = re.compile(r"^\s*(\d+)\s*из\s*(\d+)\s*$")
+SINGLE_FLOOR_PATTERN = re.compile(r"^\s*(\d+)\s*$")
+NON_DIGITS_PATTERN = re.compile(r"\D+")
+YEAR_BINS = [float("-inf"), 1979, 1990, 2000, 2010, 2020, float("inf")]
+YEAR_LABELS = ["<1980", "1980-1990", "1990-2000", "2000-2010", "2010-2020", ">2020"]
+
+def xpaths(*keys: str) -> List[str]:
+    result = []
+    for key in keys:
+        value = XPATHS[key]
+        result.extend(value if isinstance(value, list) else [value])
+    return result
+
+OUTPUT_FORMATS = ["csv", "parquet", "sqlite", "duckdb"]
+JOB_KEYS = ["action", "category", "pages", "urls", "save_count", "format", "output", "crawl_mode", "workers", "base_url"]
+
+def build_sink(output_file: str, record_class, output_format: Optional[str] = None):
+    output_format = output_format or CONFIG["OUTPUT_FORMAT"]
+    if output_format == "csv":
+        return CsvSink(output_file, CONFIG["OUTPUT_ENCODING"], CONFIG["OUTPUT_SEPARATOR"])
+    if output_format == "parquet":
+        return ParquetSink(output_file, RowBuffer(record_class).column_types())
+    if output_format in ("sqlite", "duckdb"):
+        return DatabaseSink(
+            CONFIG["OUTPUT_DB"] or output_file,
+            os.path.splitext(os.path.basename(output_file))[0],
+            RowBuffer(record_class).column_types(),
+            link_column=record_class.COLUMNS["link"],
+            price_column=record_class.COLUMNS["price"],
+            backend=output_format,
+        )
+    raise ValueError(f"Unknown output format: {output_format}")
+
+# Fields read from one multi-variant XPATHS entry (SELLER, PRICE, TOILET, ...): the
+# variants are alternative layouts of the same value, so the one that usually hits
+# may be tried first. Fields combining several entries (SQUARE, FLOOR) keep their order.
+INTERCHANGEABLE_FIELDS = [key for key, value in XPATHS.items() if isinstance(value, list)]
+
+METRICS = ExtractionMetrics()
+LOCATOR_ORDER: Optional[LocatorOrder] = None
+
+def load_locator_order() -> LocatorOrder:
+    """Learned locator order for this run, read from CONFIG["LOCATOR_ORDER_FILE"] as it is once the config is applied."""
+    global LOCATOR_ORDER
+    LOCATOR_ORDER = LocatorOrder(CONFIG["LOCATOR_ORDER_FILE"], interchangeable=INTERCHANGEABLE_FIELDS)
+    return LOCATOR_ORDER
+
+def extract_fields(document, fields: Dict[str, List[str]], metrics: Optional[ExtractionMetrics] = METRICS, scope: Optional[str] = None) -> Dict[str, Optional[str]]:
+    if scope and LOCATOR_ORDER is not None:
+        found = document.find_many(LOCATOR_ORDER.reorder(scope, fields), LOCATOR_ORDER.observer(scope, fields, metrics))
+    else:
+        found = document.find_many(fields, metrics)
+    missing = [field for field, text in found.items() if text is None]
+    if missing:
+        logger.error(f"No elements found for fields: {missing}")
+    return {field: text if text else None for field, text in found.items()}
+
+def parse_listing(parser_class, link: str, document):
+    schema = parser_class.SCHEMA
+    return parser_class.build_row(link, schema.expand(extract_fields(document, schema.lookups, scope=parser_class.__name__)))
+
+def parse_listing_html(parser_class, link: str, source: str):
+    return parse_listing(parser_class, link, LxmlDocument(link, source))
+
+def links_from_html(page_url: str, source: str) -> List[str]:
+    document = LxmlDocument(page_url, source)
+    return [urllib.parse.urljoin(page_url, href) for href in document.find_all_attributes(XPATHS["CARD_LINK"], "href")]
+
+def cards_from_html(page_url: str, source: str) -> List[Tuple[str, Optional[str]]]:
+    """Listing links on a result page, each with a fingerprint of the card's price and date."""
+    document = LxmlDocument(page_url, source)
+    cards = []
+    for card in compile_xpath(XPATHS["CARD"])(document.tree):
+        hrefs = compile_xpath(XPATHS["CARD_HREF"])(card)
+        if not hrefs:
+            continue
+        price = " ".join(node_text(node) for node in compile_xpath(XPATHS["CARD_PRICE"])(card))
+        date = " ".join(node_text(node) for node in compile_xpath(XPATHS["CARD_DATE"])(card))
+        cards.append((urllib.parse.urljoin(page_url, hrefs[0]), fingerprint(price, date) if price or date else None))
+    if not cards:
+        cards = [(link, None) for link in links_from_html(page_url, source)]
+    return cards
+
 class Action(Enum):
     SELL = "sell"
     RENT = "rent"
@@ -126,649 +298,318 @@ class Category(Enum):
     COMMERCE = "59"
 
 class Parser(ABC):
-    def __init__(self, driver: webdriver.Chrome):
+    """Base listing parser; a subclass only declares its FieldSchema.
 
-        self.driver = driver
-        self.data: Dict[str, List] = {}
+    FIELDS and RECORD are taken from the schema when the subclass is defined.
+    """
 
-    def safe_extract(self, locators: List[Tuple[By, str]], timeout: float) -> Optional[str]:
+    SCHEMA: FieldSchema
+    FIELDS: Dict[str, List[str]] = {}
+    RECORD: type
 
-        if not isinstance(locators, list):
-            locators = [locators]
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        schema = cls.__dict__.get("SCHEMA")
+        if schema is not None:
+            cls.FIELDS = schema.fields
+            cls.RECORD = schema.record
 
-        for by, xpath in locators:
-            try:
-                element = WebDriverWait(self.driver, timeout).until(
-                    EC.presence_of_element_located((by, xpath))
-                )
-                text = element.text.strip()
-                return text if text else pd.NA
-            except (TimeoutException, NoSuchElementException):
-                logger.debug(f"Element not found with locator: {(by, xpath)}")
-                continue
-        logger.error(f"No elements found for locators: {locators}")
-        return pd.NA
+    def __init__(self, driver: "webdriver.Chrome", fetcher=None):
 
-    def year_category(self, year: Optional[str]) -> Optional[str]:
-        if pd.isna(year):
-            return pd.NA
-        try:
-            year = int(year)
-            if year < 1980:
-                return "<1980"
-            elif 1980 <= year <= 1990:
-                return "1980-1990"
-            elif 1990 < year <= 2000:
-                return "1990-2000"
-            elif 2000 < year <= 2010:
-                return "2000-2010"
-            elif 2010 < year <= 2020:
-                return "2010-2020"
-            return ">2020"
-        except (ValueError, TypeError):
-            return pd.NA
-
-    def floor_category(self, floor: Optional[str], max_floor: Optional[str]) -> Optional[str]:
-        if pd.isna(floor) or pd.isna(max_floor):
-            return pd.NA
-        try:
-            floor, max_floor = int(floor), int(max_floor)
-            if floor == 1:
-                return "Первый этаж"
-            elif floor == 2:
-                return "Второй этаж"
-            elif floor > 2 and floor < max_floor - 1:
-                return "Средние этажи"
-            elif max_floor - floor == 1:
-                return "Предпоследний этаж"
-            elif floor == max_floor:
-                return "Последний этаж"
-            return pd.NA
-        except (ValueError, TypeError):
-            return pd.NA
-
-    def resize(self) -> None:
-        max_len = max(len(lst) for lst in self.data.values())
-        for key in self.data:
-            current_len = len(self.data[key])
-            if current_len < max_len:
-                self.data[key].extend([pd.NA] * (max_len - current_len))
-
-    def save_to_csv(self, filename: str, encoding: str = CONFIG["OUTPUT_ENCODING"], separator: str = CONFIG["OUTPUT_SEPARATOR"]) -> Optional[pd.DataFrame]:
-        try:
-            df = pd.DataFrame(self.data)
-            df.to_csv(filename, encoding=encoding, sep=separator, mode='a', index=False, header=not os.path.exists(filename))
-            logger.info(f"Data saved to {filename}")
-            return df
-        except Exception as e:
-            logger.error(f"Error saving to CSV: {e}")
-            return None
-    
-    def clear_data(self):
-        for key in self.data:
-            self.data[key] = []
-    
-    @abstractmethod
-    def parse_page(self, link: str) -> None:
-        pass
+        self.driver = driver
+        self.fetcher = fetcher or SeleniumFetcher(driver, XPATHS["OFFER_TITLE"], CONFIG["PAGE_READY_TIMEOUT"])
+        self.document = None
+        self.values: Dict[str, Optional[str]] = {}
+        self.rows = self.row_buffer()
 
-    def print_data(self) -> Dict[str, List]:
-        return self.data
+    def load_page(self, link: str) -> None:
+        self.document = self.fetcher.fetch(link)
+        self.values = self.SCHEMA.expand(self.extract_batch(self.SCHEMA.lookups))
 
-class AppartmentSellParser(Parser):
+    def extract_batch(self, fields: Dict[str, List[str]]) -> Dict[str, Optional[str]]:
+        return extract_fields(self.document, fields, scope=type(self).__name__)
 
-    def __init__(self, driver: webdriver.Chrome):
-        super().__init__(driver)
-        self.data = {
-            "Ссылка": [],
-            "Комнатность": [],
-            "Площадь": [],
-            "Этаж": [],
-            "Этажность дома": [],
-            "Этажность категория": [],
-            "Ценна за квм": [],
-            "Стоимость": [],
-            "Район": [],
-            "Адрес": [],
-            "ЖК": [],
-            "Тип построения": [],
-            "Год постройки": [],
-            "Год постройки - категория": [],
-            "состояние": [],
-            "потолки": [],
-            "санузел": [],
-            "продавец": [],
-        }
-
-    def parse_rooms(self) -> None:
-        room_size = self.safe_extract([(By.XPATH, XPATHS["OFFER_TITLE"])], CONFIG["TIMEOUT"])
-        self.data["Комнатность"].append(
-            room_size[0] if pd.notna(room_size) and room_size and room_size[0].isdigit() else pd.NA
-        )
+    def safe_extract(self, locators: List[Tuple[str, str]], timeout: float = 0) -> Optional[str]:
 
-    def parse_area(self) -> Optional[float]:
-        square = self.safe_extract([(By.XPATH, XPATHS["LIVE_SQUARE"])], CONFIG["TIMEOUT"])
-        square_clean = float(re.search(r"\d+\.?\d*", square).group()) if pd.notna(square) else pd.NA
-        self.data["Площадь"].append(square_clean)
-        return square_clean
-
-    def parse_floor(self) -> None:
-        floor = self.safe_extract([(By.XPATH, XPATHS["FLAT_FLOOR"])], CONFIG["TIMEOUT"])
-        if pd.notna(floor) and "из" in floor:
-            floor_parts = [int(i.strip()) for i in floor.split("из")]
-            self.data["Этаж"].append(floor_parts[0])
-            self.data["Этажность дома"].append(floor_parts[1])
-            self.data["Этажность категория"].append(self.floor_category(floor_parts[0], floor_parts[1]))
-        elif pd.notna(floor) and floor.strip().isdigit():
-            self.data["Этаж"].append(int(floor))
-            self.data["Этажность дома"].append(int(floor))
-            self.data["Этажность категория"].append(self.floor_category(floor, floor))
-        else:
-            self.data["Этаж"].append(pd.NA)
-            self.data["Этажность дома"].append(pd.NA)
-            self.data["Этажность категория"].append(pd.NA)
-
-    def parse_district(self) -> None:
-        district = self.safe_extract([(By.XPATH, XPATHS["LOCATION"])], CONFIG["TIMEOUT"])
-        self.data["Район"].append(
-            district.split(",")[1].strip() if pd.notna(district) and len(district.split(",")) > 1 else pd.NA
-        )
+        if not isinstance(locators, list):
+            locators = [locators]
 
-    def parse_address(self) -> None:
-        address = self.safe_extract([(By.XPATH, XPATHS["OFFER_TITLE"])], CONFIG["TIMEOUT"])
-        self.data["Адрес"].append(
-            address.split(",")[-1].strip() if pd.notna(address) and "," in address else pd.NA
+        text = self.document.find_text(locators, timeout)
+        if text is None:
+            logger.error(f"No elements found for locators: {locators}")
+            return None
+        return text if text else None
+
+    @staticmethod
+    def year_category(year: "pd.Series") -> "pd.Series":
+        import pandas as pd
+        years = pd.to_numeric(year.astype("string").str.strip(), errors="coerce").astype("Float64")
+        years = years.where(years % 1 == 0)
+        return pd.cut(years.astype(float), YEAR_BINS, labels=YEAR_LABELS).astype("string")
+
+    @staticmethod
+    def floor_category(floor: "pd.Series", max_floor: "pd.Series") -> "pd.Series":
+        import numpy as np
+        import pandas as pd
+        index = floor.index
+        floor = floor.astype("Float64").to_numpy(dtype=float, na_value=np.nan)
+        max_floor = max_floor.astype("Float64").to_numpy(dtype=float, na_value=np.nan)
+        categories = np.select(
+            [floor == 1, floor == 2, (floor > 2) & (floor < max_floor - 1), max_floor - floor == 1, floor == max_floor],
+            ["Первый этаж", "Второй этаж", "Средние этажи", "Предпоследний этаж", "Последний этаж"],
+            default=None,
         )
-
-    def parse_residential_complex(self) -> None:
-        residential_complex = self.safe_extract([(By.XPATH, XPATHS["RESIDENTIAL_COMPLEX"])], CONFIG["TIMEOUT"])
-        self.data["ЖК"].append(residential_complex)
-
-    def parse_building_type(self) -> None:
-        building_type = self.safe_extract([(By.XPATH, XPATHS["BUILDING_TYPE"])], CONFIG["TIMEOUT"])
-        self.data["Тип построения"].append(building_type)
-
-    def parse_construction_year(self) -> None:
-        year = self.safe_extract([(By.XPATH, XPATHS["HOUSE_YEAR"])], CONFIG["TIMEOUT"])
-        self.data["Год постройки"].append(year)
-        self.data["Год постройки - категория"].append(self.year_category(year))
-
-    def parse_condition(self) -> None:
-        condition = self.safe_extract([(By.XPATH, XPATHS["RENOVATION"])], CONFIG["TIMEOUT"])
-        self.data["состояние"].append(condition)
-
-    def parse_ceiling_height(self) -> None:
-        ceiling_height = self.safe_extract([(By.XPATH, x) for x in XPATHS["CEILING"]], CONFIG["TIMEOUT"])
-        self.data["потолки"].append(ceiling_height)
-
-    def parse_bathroom(self) -> None:
-        bathroom = self.safe_extract([(By.XPATH, x) for x in XPATHS["TOILET"]], CONFIG["TIMEOUT"])
-        self.data["санузел"].append(bathroom)
-
-    def parse_seller(self) -> None:
-        seller = self.safe_extract([(By.XPATH, x) for x in XPATHS["SELLER"]], CONFIG["TIMEOUT"])
-        self.data["продавец"].append(seller)
-
-    def parse_price(self, area: Optional[float]) -> None:
-        try:
-            price = self.safe_extract([(By.XPATH, x) for x in XPATHS["PRICE"]], CONFIG["TIMEOUT"])
-            price_clean = re.sub(r"[^\d\s]", "", price).strip().replace(" ", "") if pd.notna(price) else pd.NA
-            self.data["Стоимость"].append(price_clean)
-            self.data["Ценна за квм"].append(
-                round(float(price_clean) / float(area), 2) if pd.notna(price_clean) and pd.notna(area) else pd.NA
-            )
-        except ValueError:
-            print(f"couldn't convert the price type: {type(price_clean)} to float")
-            logger.error(f"couldn't convert the price type: {type(price_clean)} to float")
-    def parse_page(self, link: str) -> None:
+        categories[np.isnan(max_floor)] = None
+        return pd.Series(categories, index=index, dtype="string")
+
+    @staticmethod
+    def parse_area(square: "pd.Series") -> "pd.Series":
+        import pandas as pd
+        return pd.to_numeric(square.astype("string").str.extract(AREA_PATTERN, expand=False), errors="coerce").astype("Float64")
+
+    @staticmethod
+    def parse_price(price: "pd.Series") -> "pd.Series":
+        import pandas as pd
+        digits = price.astype("string").str.replace(NON_DIGITS_PATTERN, "", regex=True)
+        return pd.to_numeric(digits.mask(digits == ""), errors="coerce").astype("Int64")
+
+    @staticmethod
+    def price_per_square(price: "pd.Series", area: "pd.Series") -> "pd.Series":
+        area = area.astype("Float64")
+        return (price.astype("Float64") / area.mask(area == 0)).round(2)
+
+    @staticmethod
+    def parse_district(location: Optional[str], last: bool = False) -> Optional[str]:
+        if last:
+            return location.split(",")[-1].strip() if location and "," in location else None
+        return location.split(",")[1].strip() if location and len(location.split(",")) > 1 else None
+
+    @staticmethod
+    def parse_address(address: Optional[str], whole: bool = False) -> Optional[str]:
+        """Part after the last comma; with `whole`, an address without commas is kept as is."""
+        if address and "," in address:
+            return address.split(",")[-1].strip()
+        return address if whole and address else None
+
+    @staticmethod
+    def parse_rooms(title: Optional[str]) -> Optional[str]:
+        return title[0] if title and title[0].isdigit() else None
+
+    @staticmethod
+    def parse_floor(floor: "pd.Series", part: int, single: bool = True) -> "pd.Series":
+        """Floor (`part` 0) or building height (`part` 1) from "5 из 9"; with `single`, a bare "5" counts as a one-storey building."""
+        import pandas as pd
+        floor = floor.astype("string")
+        parsed = floor.str.extract(FLOOR_PATTERN)[part]
+        if single:
+            parsed = parsed.fillna(floor.str.extract(SINGLE_FLOOR_PATTERN, expand=False))
+        return pd.to_numeric(parsed, errors="coerce").astype("Int64")
+
+    def save_to_csv(self, filename: str, encoding: Optional[str] = None, separator: Optional[str] = None) -> Optional["pd.DataFrame"]:
+        df = self.rows.to_frame()
+        sink = CsvSink(filename, encoding or CONFIG["OUTPUT_ENCODING"], separator or CONFIG["OUTPUT_SEPARATOR"])
         try:
-            self.driver.get(link)
-            self.driver.implicitly_wait(1)
-            self.data["Ссылка"].append(link)
-            area = self.parse_area()
-            self.parse_rooms()
-            self.parse_floor()
-            self.parse_district()
-            self.parse_address()
-            self.parse_residential_complex()
-            self.parse_building_type()
-            self.parse_construction_year()
-            self.parse_condition()
-            self.parse_ceiling_height()
-            self.parse_bathroom()
-            self.parse_seller()
-            self.parse_price(area)
-        except Exception as e:
-            logger.error(f"Error parsing page {link}: {e}")
-
-class AppartmentRentParser(Parser):
-
-    def __init__(self, driver: webdriver.Chrome):
-        super().__init__(driver)
-        self.data = {
-            "Ссылка": [],
-            "Комнатность": [],
-            "Площадь": [],
-            "Этаж": [],
-            "Этажность дома": [],
-            "Этажность категория": [],
-            "Ценна за квм": [],
-            "Ценна": [],
-            "Район": [],
-            "Адрес": [],
-            "ЖК": [],
-            "Тип построения": [],
-            "Год постройки": [],
-            "Год постройки - категория": [],
-            "состояние": [],
-            "потолки": [],
-            "санузел": [],
-            "продавец": [],
-        }
-
-    def parse_rooms(self) -> None:
-        room_size = self.safe_extract([(By.XPATH, XPATHS["OFFER_TITLE"])], CONFIG["TIMEOUT"])
-        self.data["Комнатность"].append(
-            room_size[0] if pd.notna(room_size) and room_size and room_size[0].isdigit() else pd.NA
-        )
-
-    def parse_area(self) -> Optional[float]:
-        square = self.safe_extract([(By.XPATH, XPATHS["LIVE_SQUARE"])], CONFIG["TIMEOUT"])
-        square_clean = float(re.search(r"\d+\.?\d*", square).group()) if pd.notna(square) else pd.NA
-        self.data["Площадь"].append(square_clean)
-        return square_clean
-
-    def parse_floor(self) -> None:
-        floor = self.safe_extract([(By.XPATH, XPATHS["FLAT_FLOOR"])], CONFIG["TIMEOUT"])
-        if pd.notna(floor) and "из" in floor:
-            floor_parts = [int(i.strip()) for i in floor.split("из")]
-            self.data["Этаж"].append(floor_parts[0])
-            self.data["Этажность дома"].append(floor_parts[1])
-            self.data["Этажность категория"].append(self.floor_category(floor_parts[0], floor_parts[1]))
-        else:
-            self.data["Этаж"].append(pd.NA)
-            self.data["Этажность дома"].append(pd.NA)
-            self.data["Этажность категория"].append(pd.NA)
-
-    def parse_district(self) -> None:
-        district = self.safe_extract([(By.XPATH, XPATHS["LOCATION"])], CONFIG["TIMEOUT"])
-        self.data["Район"].append(
-            district.split(",")[1].strip() if pd.notna(district) and len(district.split(",")) > 1 else pd.NA
-        )
-
-    def parse_address(self) -> None:
-        address = self.safe_extract([(By.XPATH, XPATHS["OFFER_TITLE"])], CONFIG["TIMEOUT"])
-        self.data["Адрес"].append(
-            address.split(",")[-1].strip() if pd.notna(address) and "," in address else pd.NA
-        )
-
-    def parse_residential_complex(self) -> None:
-        residential_complex = self.safe_extract([(By.XPATH, XPATHS["RESIDENTIAL_COMPLEX"])], CONFIG["TIMEOUT"])
-        self.data["ЖК"].append(residential_complex)
-
-    def parse_building_type(self) -> None:
-        building_type = self.safe_extract([(By.XPATH, XPATHS["BUILDING_TYPE"])], CONFIG["TIMEOUT"])
-        self.data["Тип построения"].append(building_type)
-
-    def parse_construction_year(self) -> None:
-        year = self.safe_extract([(By.XPATH, XPATHS["HOUSE_YEAR"])], CONFIG["TIMEOUT"])
-        self.data["Год постройки"].append(year)
-        self.data["Год постройки - категория"].append(self.year_category(year))
+            return df if sink.write(df) else None
+        finally:
+            sink.close()
+    
+    def clear_data(self):
+        self.rows.clear()
 
-    def parse_condition(self) -> None:
-        condition = self.safe_extract([(By.XPATH, XPATHS["RENT_RENOVATION"])], CONFIG["TIMEOUT"])
-        self.data["состояние"].append(condition)
+    def pop_rows(self) -> List:
+        return self.rows.pop_all()
 
-    def parse_ceiling_height(self) -> None:
-        ceiling_height = self.safe_extract([(By.XPATH, XPATHS["CEILING"][0])], CONFIG["TIMEOUT"])
-        self.data["потолки"].append(ceiling_height)
+    def add_row(self, record) -> None:
+        self.rows.append(record)
 
-    def parse_bathroom(self) -> None:
-        bathroom = self.safe_extract([(By.XPATH, x) for x in XPATHS["TOILET"]], CONFIG["TIMEOUT"])
-        self.data["санузел"].append(bathroom)
+    @classmethod
+    def build_row(cls, link: str, values: Dict[str, Optional[str]]):
+        return cls.SCHEMA.build(link, values)
 
-    def parse_seller(self) -> None:
-        seller = self.safe_extract([(By.XPATH, x) for x in XPATHS["SELLER"]], CONFIG["TIMEOUT"])
-        self.data["продавец"].append(seller)
+    @classmethod
+    def row_buffer(cls) -> RowBuffer:
+        return RowBuffer(cls.RECORD, cls.SCHEMA.finish, cls.SCHEMA.batched)
 
-    def parse_price(self, area: Optional[float]) -> None:
-        try:
-            price = self.safe_extract([(By.XPATH, x) for x in XPATHS["PRICE"]], CONFIG["TIMEOUT"])
-            price_clean = re.sub(r"[^\d\s]", "", price).strip().replace(" ", "") if pd.notna(price) else pd.NA
-            self.data["Ценна"].append(price_clean)
-            self.data["Ценна за квм"].append(
-                round(float(price_clean) / float(area), 2) if pd.notna(price_clean) and pd.notna(area) else pd.NA
-            )
-        except ValueError:
-            print(f"couldn't convert the price type: {type(price_clean)} to float")
-            logger.error(f"couldn't convert the price type: {type(price_clean)} to float")  
-
-    def parse_page(self, link: str) -> None:
+    def parse_page(self, link: str) -> bool:
         try:
-            self.driver.get(link)
-            self.driver.implicitly_wait(1)
-            self.data["Ссылка"].append(link)
-            area = self.parse_area()
-            self.parse_rooms()
-            self.parse_floor()
-            self.parse_district()
-            self.parse_address()
-            self.parse_residential_complex()
-            self.parse_building_type()
-            self.parse_construction_year()
-            self.parse_condition()
-            self.parse_ceiling_height()
-            self.parse_bathroom()
-            self.parse_seller()
-            self.parse_price(area)
+            self.load_page(link)
+            self.add_row(self.build_row(link, self.values))
+            return True
         except Exception as e:
+            if is_browser_failure(e):
+                raise
             logger.error(f"Error parsing page {link}: {e}")
+            return False
+
+    def print_data(self) -> "pd.DataFrame":
+        return self.rows.to_frame()
+
+APARTMENT_SELL_SCHEMA = FieldSchema(
+    ApartmentSellRecord,
+    fields={
+        "OFFER_TITLE": xpaths("OFFER_TITLE"),
+        "SQUARE": xpaths("LIVE_SQUARE"),
+        "FLOOR": xpaths("FLAT_FLOOR"),
+        "LOCATION": xpaths("LOCATION"),
+        "RESIDENTIAL_COMPLEX": xpaths("RESIDENTIAL_COMPLEX"),
+        "BUILDING_TYPE": xpaths("BUILDING_TYPE"),
+        "HOUSE_YEAR": xpaths("HOUSE_YEAR"),
+        "RENOVATION": xpaths("RENOVATION"),
+        "CEILING": xpaths("CEILING"),
+        "TOILET": xpaths("TOILET"),
+        "SELLER": xpaths("SELLER"),
+        "PRICE": xpaths("PRICE"),
+    },
+    columns=[
+        column("rooms", "OFFER_TITLE", transform=Parser.parse_rooms),
+        batch_column("area", "SQUARE", transform=Parser.parse_area),
+        batch_column("floor", "FLOOR", transform=partial(Parser.parse_floor, part=0)),
+        batch_column("max_floor", "FLOOR", transform=partial(Parser.parse_floor, part=1)),
+        batch_column("floor_category", "floor", "max_floor", transform=Parser.floor_category),
+        batch_column("price", "PRICE", transform=Parser.parse_price),
+        batch_column("price_per_square", "price", "area", transform=Parser.price_per_square),
+        column("district", "LOCATION", transform=Parser.parse_district),
+        column("address", "OFFER_TITLE", transform=Parser.parse_address),
+        column("residential_complex", "RESIDENTIAL_COMPLEX"),
+        column("building_type", "BUILDING_TYPE"),
+        column("year", "HOUSE_YEAR"),
+        batch_column("year_category", "HOUSE_YEAR", transform=Parser.year_category),
+        column("condition", "RENOVATION"),
+        column("ceiling", "CEILING"),
+        column("bathroom", "TOILET"),
+        column("seller", "SELLER"),
+    ],
+)
 
-class CommerceSellParser(Parser):
-
-    def __init__(self, driver: webdriver.Chrome):
-        super().__init__(driver)
-        self.data = {
-            "Ссылка": [],
-            "Площадь": [],
-            "Этажность": [],
-            "Ценна за квм": [],
-            "Стоимость": [],
-            "Район": [],
-            "Адрес": [],
-            "Размещение объекта": [],
-            "Название объекта": [],
-            "Год постройки": [],
-            "Год постройки - категория": [],
-            "состояние": [],
-            "потолки": [],
-            "Действующий бизнес": [],
-            "коммуникации": [],
-            "Линия домов": [],
-            "Безопасность": [],
-            "Свободная планировка": [],
-            "Вход": [],
-            "Парковка": [],
-            "Выделенная мощность": [],
-            "продавец": [],
-        }
-
-    def parse_area(self) -> Optional[float]:
-        square = self.safe_extract([(By.XPATH, x) for x in [XPATHS["LIVE_SQUARE"], XPATHS["COM_SQUARE"]]], CONFIG["TIMEOUT"])
-        square_clean = float(re.search(r"\d+\.?\d*", square).group()) if pd.notna(square) else pd.NA
-        self.data["Площадь"].append(square_clean)
-        return square_clean
-
-    def parse_floor(self) -> None:
-        floor = self.safe_extract([(By.XPATH, x) for x in [XPATHS["HOUSE_FLOOR_NUM"], XPATHS["FLAT_FLOOR"]]], CONFIG["TIMEOUT"])
-        self.data["Этажность"].append(floor)
-
-    def parse_district(self) -> None:
-        district = self.safe_extract([(By.XPATH, XPATHS["LOCATION"])], CONFIG["TIMEOUT"])
-        self.data["Район"].append(
-            district.split(",")[1].strip() if pd.notna(district) and len(district.split(",")) > 1 else pd.NA
-        )
-
-    def parse_address(self) -> None:
-        address = self.safe_extract([(By.XPATH, XPATHS["ADDRESS"])], CONFIG["TIMEOUT"])
-        self.data["Адрес"].append(
-            address.split(",")[-1].strip() if pd.notna(address) and "," in address else pd.NA
-        )
-
-    def parse_object_placement(self) -> None:
-        object_placement = self.safe_extract([(By.XPATH, XPATHS["COM_LOCATION"])], CONFIG["TIMEOUT"])
-        self.data["Размещение объекта"].append(object_placement)
-
-    def parse_object_name(self) -> None:
-        object_name = self.safe_extract([(By.XPATH, XPATHS["COMPLEX_NAME"])], CONFIG["TIMEOUT"])
-        self.data["Название объекта"].append(object_name)
-
-    def parse_construction_year(self) -> None:
-        year = self.safe_extract([(By.XPATH, XPATHS["HOUSE_YEAR"])], CONFIG["TIMEOUT"])
-        self.data["Год постройки"].append(year)
-        self.data["Год постройки - категория"].append(self.year_category(year))
-
-    def parse_condition(self) -> None:
-        condition = self.safe_extract([(By.XPATH, x) for x in XPATHS["COM_RENOVATION"]], CONFIG["TIMEOUT"])
-        self.data["состояние"].append(condition)
-
-    def parse_ceiling_height(self) -> None:
-        ceiling_height = self.safe_extract([(By.XPATH, x) for x in XPATHS["CEILING"]], CONFIG["TIMEOUT"])
-        self.data["потолки"].append(ceiling_height)
-
-    def parse_operating_business(self) -> None:
-        operating_business = self.safe_extract([(By.XPATH, x) for x in XPATHS["OPERATING_BUSINESS"]], CONFIG["TIMEOUT"])
-        self.data["Действующий бизнес"].append(operating_business)
-
-    def parse_communications(self) -> None:
-        communications = self.safe_extract([(By.XPATH, x) for x in XPATHS["COMMUNICATIONS"]], CONFIG["TIMEOUT"])
-        self.data["коммуникации"].append(communications)
-
-    def parse_location_line(self) -> None:
-        location_line = self.safe_extract([(By.XPATH, x) for x in XPATHS["LOCATION_LINE"]], CONFIG["TIMEOUT"])
-        self.data["Линия домов"].append(location_line)
-
-    def parse_security(self) -> None:
-        security = self.safe_extract([(By.XPATH, x) for x in XPATHS["SECURITY"]], CONFIG["TIMEOUT"])
-        self.data["Безопасность"].append(security)
+APARTMENT_RENT_SCHEMA = APARTMENT_SELL_SCHEMA.derive(
+    ApartmentRentRecord,
+    fields={
+        "RENOVATION": xpaths("RENT_RENOVATION"),
+        "CEILING": xpaths("CEILING")[:1],
+    },
+    columns=[
+        batch_column("floor", "FLOOR", transform=partial(Parser.parse_floor, part=0, single=False)),
+        batch_column("max_floor", "FLOOR", transform=partial(Parser.parse_floor, part=1, single=False)),
+    ],
+)
 
-    def parse_free_layout(self) -> None:
-        free_layout = self.safe_extract([(By.XPATH, XPATHS["CUSTOM_LAYOUT"])], CONFIG["TIMEOUT"])
-        self.data["Свободная планировка"].append(free_layout)
+COMMERCE_SELL_SCHEMA = FieldSchema(
+    CommerceSellRecord,
+    fields={
+        "SQUARE": xpaths("LIVE_SQUARE", "COM_SQUARE"),
+        "FLOOR": xpaths("HOUSE_FLOOR_NUM", "FLAT_FLOOR"),
+        "LOCATION": xpaths("LOCATION"),
+        "ADDRESS": xpaths("ADDRESS"),
+        "COM_LOCATION": xpaths("COM_LOCATION"),
+        "COMPLEX_NAME": xpaths("COMPLEX_NAME"),
+        "HOUSE_YEAR": xpaths("HOUSE_YEAR"),
+        "COM_RENOVATION": xpaths("COM_RENOVATION"),
+        "CEILING": xpaths("CEILING"),
+        "OPERATING_BUSINESS": xpaths("OPERATING_BUSINESS"),
+        "COMMUNICATIONS": xpaths("COMMUNICATIONS"),
+        "LOCATION_LINE": xpaths("LOCATION_LINE"),
+        "SECURITY": xpaths("SECURITY"),
+        "CUSTOM_LAYOUT": xpaths("CUSTOM_LAYOUT"),
+        "ENTRANCE": xpaths("ENTRANCE"),
+        "PARKING": xpaths("PARKING"),
+        "ALLOCATED_POWER": xpaths("ALLOCATED_POWER"),
+        "SELLER": xpaths("SELLER"),
+        "COM_PRICE": xpaths("COM_PRICE"),
+    },
+    columns=[
+        batch_column("area", "SQUARE", transform=Parser.parse_area),
+        column("floors", "FLOOR"),
+        batch_column("price", "COM_PRICE", transform=Parser.parse_price),
+        batch_column("price_per_square", "price", "area", transform=Parser.price_per_square),
+        column("district", "LOCATION", transform=Parser.parse_district),
+        column("address", "ADDRESS", transform=Parser.parse_address),
+        column("placement", "COM_LOCATION"),
+        column("object_name", "COMPLEX_NAME"),
+        column("year", "HOUSE_YEAR"),
+        batch_column("year_category", "HOUSE_YEAR", transform=Parser.year_category),
+        column("condition", "COM_RENOVATION"),
+        column("ceiling", "CEILING"),
+        column("operating_business", "OPERATING_BUSINESS"),
+        column("communications", "COMMUNICATIONS"),
+        column("location_line", "LOCATION_LINE"),
+        column("security", "SECURITY"),
+        column("free_layout", "CUSTOM_LAYOUT"),
+        column("entrance", "ENTRANCE"),
+        column("parking", "PARKING"),
+        column("allocated_power", "ALLOCATED_POWER"),
+        column("seller", "SELLER"),
+    ],
+)
 
-    def parse_entrance(self) -> None:
-        entrance = self.safe_extract([(By.XPATH, XPATHS["ENTRANCE"])], CONFIG["TIMEOUT"])
-        self.data["Вход"].append(entrance)
+COMMERCE_RENT_SCHEMA = COMMERCE_SELL_SCHEMA.derive(
+    CommerceRentRecord,
+    fields={"SQUARE": xpaths("COM_SQUARE")},
+    columns=[
+        column("district", "LOCATION", transform=partial(Parser.parse_district, last=True)),
+        column("address", "ADDRESS", transform=partial(Parser.parse_address, whole=True)),
+    ],
+)
 
-    def parse_parking(self) -> None:
-        parking = self.safe_extract([(By.XPATH, x) for x in XPATHS["PARKING"]], CONFIG["TIMEOUT"])
-        self.data["Парковка"].append(parking)
+def make_parser(name: str, schema: FieldSchema) -> type:
+    """Parser class for a new category, built from its schema alone."""
+    return type(name, (Parser,), {"SCHEMA": schema})
 
-    def parse_allocated_power(self) -> None:
-        allocated_power = self.safe_extract([(By.XPATH, x) for x in XPATHS["ALLOCATED_POWER"]], CONFIG["TIMEOUT"])
-        self.data["Выделенная мощность"].append(allocated_power)
+class AppartmentSellParser(Parser):
+    SCHEMA = APARTMENT_SELL_SCHEMA
 
-    def parse_seller(self) -> None:
-        seller = self.safe_extract([(By.XPATH, x) for x in XPATHS["SELLER"]], CONFIG["TIMEOUT"])
-        self.data["продавец"].append(seller)
+class AppartmentRentParser(Parser):
+    SCHEMA = APARTMENT_RENT_SCHEMA
 
-    def parse_price(self, area: Optional[float]) -> None:
-        try:
-            price = self.safe_extract([(By.XPATH, x) for x in XPATHS["COM_PRICE"]], CONFIG["TIMEOUT"])
-            price_clean = re.sub(r"[^\d\s]", "", price).strip().replace(" ", "") if pd.notna(price) else pd.NA
-            self.data["Стоимость"].append(price_clean)
-            self.data["Ценна за квм"].append(
-                round(float(price_clean) / float(area), 2) if pd.notna(price_clean) and pd.notna(area) else pd.NA
-            )
-        except ValueError:
-            print(f"couldn't convert the price type: {type(price_clean)} to float")
-            logger.error(f"couldn't convert the price type: {type(price_clean)} to float")
-            
-    def parse_page(self, link: str) -> None:
-        """Parse a single commercial sale listing page."""
-        try:
-            self.driver.get(link)
-            self.driver.implicitly_wait(1)
-            self.data["Ссылка"].append(link)
-            area = self.parse_area()
-            self.parse_floor()
-            self.parse_district()
-            self.parse_address()
-            self.parse_object_placement()
-            self.parse_object_name()
-            self.parse_construction_year()
-            self.parse_condition()
-            self.parse_ceiling_height()
-            self.parse_operating_business()
-            self.parse_communications()
-            self.parse_location_line()
-            self.parse_security()
-            self.parse_free_layout()
-            self.parse_entrance()
-            self.parse_parking()
-            self.parse_allocated_power()
-            self.parse_seller()
-            self.parse_price(area)
-        except Exception as e:
-            logger.error(f"Error parsing page {link}: {e}")
+class CommerceSellParser(Parser):
+    SCHEMA = COMMERCE_SELL_SCHEMA
 
 class CommerceRentParser(Parser):
+    SCHEMA = COMMERCE_RENT_SCHEMA
 
-    def __init__(self, driver: webdriver.Chrome):
-        super().__init__(driver)
-        self.data = {
-            "Ссылка": [],
-            "Площадь": [],
-            "Этажность": [],
-            "Ценна за квм": [],
-            "Стоимость": [],
-            "Район": [],
-            "Адрес": [],
-            "Размещение объекта": [],
-            "Название объекта": [],
-            "Год постройки": [],
-            "Год постройки - категория": [],
-            "состояние": [],
-            "потолки": [],
-            "Действующий бизнес": [],
-            "коммуникации": [],
-            "Линия домов": [],
-            "Безопасность": [],
-            "Свободная планировка": [],
-            "Вход": [],
-            "Парковка": [],
-            "Выделенная мощность": [],
-            "продавец": [],
-        }
-
-    def parse_area(self) -> Optional[float]:
-        square = self.safe_extract([(By.XPATH, XPATHS["COM_SQUARE"])], CONFIG["TIMEOUT"])
-        square_clean = float(re.search(r"\d+\.?\d*", square).group()) if pd.notna(square) else pd.NA
-        self.data["Площадь"].append(square_clean)
-        return square_clean
-
-    def parse_floor(self) -> None:
-        floor = self.safe_extract([(By.XPATH, x) for x in [XPATHS["HOUSE_FLOOR_NUM"], XPATHS["FLAT_FLOOR"]]], CONFIG["TIMEOUT"])
-        self.data["Этажность"].append(floor)
-
-    def parse_district(self) -> None:
-        district = self.safe_extract([(By.XPATH, XPATHS["LOCATION"])], CONFIG["TIMEOUT"])
-        self.data["Район"].append(
-            district.split(",")[-1].strip() if pd.notna(district) and "," in district else pd.NA
-        )
-
-    def parse_address(self) -> None:
-        address = self.safe_extract([(By.XPATH, XPATHS["ADDRESS"])], CONFIG["TIMEOUT"])
-        self.data["Адрес"].append(
-            address.split(",")[-1].strip() if pd.notna(address) and "," in address else address if pd.notna(address) else pd.NA
-        )
-
-    def parse_object_placement(self) -> None:
-        object_placement = self.safe_extract([(By.XPATH, XPATHS["COM_LOCATION"])], CONFIG["TIMEOUT"])
-        self.data["Размещение объекта"].append(object_placement)
-
-    def parse_object_name(self) -> None:
-        object_name = self.safe_extract([(By.XPATH, XPATHS["COMPLEX_NAME"])], CONFIG["TIMEOUT"])
-        self.data["Название объекта"].append(object_name)
-
-    def parse_construction_year(self) -> None:
-        year = self.safe_extract([(By.XPATH, XPATHS["HOUSE_YEAR"])], CONFIG["TIMEOUT"])
-        self.data["Год постройки"].append(year)
-        self.data["Год постройки - категория"].append(self.year_category(year))
-
-    def parse_condition(self) -> None:
-        condition = self.safe_extract([(By.XPATH, x) for x in XPATHS["COM_RENOVATION"]], CONFIG["TIMEOUT"])
-        self.data["состояние"].append(condition)
-
-    def parse_ceiling_height(self) -> None:
-        ceiling_height = self.safe_extract([(By.XPATH, x) for x in XPATHS["CEILING"]], CONFIG["TIMEOUT"])
-        self.data["потолки"].append(ceiling_height)
-
-    def parse_operating_business(self) -> None:
-        operating_business = self.safe_extract([(By.XPATH, x) for x in XPATHS["OPERATING_BUSINESS"]], CONFIG["TIMEOUT"])
-        self.data["Действующий бизнес"].append(operating_business)
-
-    def parse_communications(self) -> None:
-        communications = self.safe_extract([(By.XPATH, x) for x in XPATHS["COMMUNICATIONS"]], CONFIG["TIMEOUT"])
-        self.data["коммуникации"].append(communications)
-
-    def parse_location_line(self) -> None:
-        location_line = self.safe_extract([(By.XPATH, x) for x in XPATHS["LOCATION_LINE"]], CONFIG["TIMEOUT"])
-        self.data["Линия домов"].append(location_line)
-
-    def parse_security(self) -> None:
-        security = self.safe_extract([(By.XPATH, x) for x in XPATHS["SECURITY"]], CONFIG["TIMEOUT"])
-        self.data["Безопасность"].append(security)
-
-    def parse_free_layout(self) -> None:
-        free_layout = self.safe_extract([(By.XPATH, XPATHS["CUSTOM_LAYOUT"])], CONFIG["TIMEOUT"])
-        self.data["Свободная планировка"].append(free_layout)
-
-    def parse_entrance(self) -> None:
-        entrance = self.safe_extract([(By.XPATH, XPATHS["ENTRANCE"])], CONFIG["TIMEOUT"])
-        self.data["Вход"].append(entrance)
-
-    def parse_parking(self) -> None:
-        parking = self.safe_extract([(By.XPATH, x) for x in XPATHS["PARKING"]], CONFIG["TIMEOUT"])
-        self.data["Парковка"].append(parking)
-
-    def parse_allocated_power(self) -> None:
-        allocated_power = self.safe_extract([(By.XPATH, x) for x in XPATHS["ALLOCATED_POWER"]], CONFIG["TIMEOUT"])
-        self.data["Выделенная мощность"].append(allocated_power)
+PARSER_MAP = {
+    (Action.SELL.value, Category.APARTMENT.value): AppartmentSellParser,
+    (Action.SELL.value, Category.COMMERCE.value): CommerceSellParser,
+    (Action.RENT.value, Category.APARTMENT.value): AppartmentRentParser,
+    (Action.RENT.value, Category.COMMERCE.value): CommerceRentParser,
+}
 
-    def parse_seller(self) -> None:
-        seller = self.safe_extract([(By.XPATH, x) for x in XPATHS["SELLER"]], CONFIG["TIMEOUT"])
-        self.data["продавец"].append(seller)
+def output_name(action: str, category: str, output_format: Optional[str] = None) -> str:
+    return f"{action}_{'apartments' if category == Category.APARTMENT.value else 'commerce'}.{output_format or CONFIG['OUTPUT_FORMAT']}"
 
-    def parse_price(self, area: Optional[float]) -> None:
-        try:
-            price = self.safe_extract([(By.XPATH, x) for x in XPATHS["COM_PRICE"]], CONFIG["TIMEOUT"])
-            price_clean = re.sub(r"[^\d\s]", "", price).strip().replace(" ", "") if pd.notna(price) else pd.NA
-            self.data["Стоимость"].append(price_clean)
-            self.data["Ценна за квм"].append(
-                round(float(price_clean) / float(area), 2) if pd.notna(price_clean) and pd.notna(area) else pd.NA
-            )
-        except ValueError:
-            print(f"couldn't convert the price type: {type(price_clean)} to float")
-            logger.error(f"couldn't convert the price type: {type(price_clean)} to float")
-
-    def parse_page(self, link: str) -> None:
-        try:
-            self.driver.get(link)
-            self.driver.implicitly_wait(1)
-            self.data["Ссылка"].append(link)
-            area = self.parse_area()
-            self.parse_floor()
-            self.parse_district()
-            self.parse_address()
-            self.parse_object_placement()
-            self.parse_object_name()
-            self.parse_construction_year()
-            self.parse_condition()
-            self.parse_ceiling_height()
-            self.parse_operating_business()
-            self.parse_communications()
-            self.parse_location_line()
-            self.parse_security()
-            self.parse_free_layout()
-            self.parse_entrance()
-            self.parse_parking()
-            self.parse_allocated_power()
-            self.parse_seller()
-            self.parse_price(area)
-        except Exception as e:
-            logger.error(f"Error parsing page {link}: {e}")
+def incremental_crawl(output_format: str) -> bool:
+    """Database outputs keep a price history, so a listing seen before is parsed again once its result card changes."""
+    return CONFIG["INCREMENTAL"] or output_format in ("sqlite", "duckdb")
 
-@contextmanager
-def init_driver():
+def start_driver(profile: Optional[str] = None) -> "webdriver.Chrome":
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
     chrome_options = Options()
-    chrome_options.add_argument("--headless")
+    if CONFIG["HEADLESS"]:
+        chrome_options.add_argument("--headless=new")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.page_load_strategy = CONFIG["PAGE_LOAD_STRATEGY"]
+    patterns = blocked_patterns(CONFIG["BLOCK_PROFILE"])
+    if "images" in BLOCK_PROFILES[CONFIG["BLOCK_PROFILE"]]:
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    if profile:
+        chrome_options.add_argument(f"--user-data-dir={profile}")
+    driver = webdriver.Chrome(options=chrome_options)
+    try:
+        driver.set_page_load_timeout(CONFIG["PAGE_LOAD_TIMEOUT"])
+        block_resources(driver, patterns)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+@contextmanager
+def init_driver(profile: Optional[str] = None):
     driver = None
     try:
-        driver = webdriver.Chrome()
+        driver = start_driver(profile)
         yield driver
     except Exception as e:
         logger.error(f"Driver initialization failed: {e}")
@@ -778,8 +619,90 @@ def init_driver():
             driver.quit()
             logger.info("Driver closed")
 
-def select_category(driver: webdriver.Chrome, action: str, category: str) -> Optional[str]:
-    driver.get(CONFIG["SITE_URL"])
+def build_driver_pool(size: Optional[int] = None) -> DriverPool:
+    """By default one slot per listing worker plus one for the paginating browser; sessions start on first use."""
+    return DriverPool(
+        start_driver,
+        size=size or CONFIG["WORKERS"] + 1,
+        profile_dir=CONFIG["BROWSER_PROFILE_DIR"],
+        max_pages=CONFIG["BROWSER_MAX_PAGES"],
+        max_memory=CONFIG["BROWSER_MAX_MEMORY_MB"] * 2 ** 20 if CONFIG["BROWSER_MAX_MEMORY_MB"] else None,
+        max_latency=CONFIG["BROWSER_MAX_LOAD_SECONDS"],
+        metrics=METRICS,
+    )
+
+def build_limiter() -> AdaptiveRateLimiter:
+    """One limiter per run, shared by every fetch path so they all slow down together."""
+    return AdaptiveRateLimiter(
+        CONFIG["RATE_LIMIT"],
+        min_rate=CONFIG["RATE_LIMIT_MIN"],
+        max_rate=CONFIG["RATE_LIMIT_MAX"],
+        slow_latency=CONFIG["SLOW_RESPONSE"],
+    )
+
+def build_cache() -> Optional[PageCache]:
+    """Page cache from CONFIG; offline replay always needs one and reads the default directory if none is set."""
+    if not CONFIG["CACHE_DIR"] and not CONFIG["OFFLINE"]:
+        return None
+    return PageCache(
+        CONFIG["CACHE_DIR"] or "http_cache",
+        CONFIG["CACHE_MAX_MB"] * 2 ** 20,
+        CONFIG["CACHE_TTL"],
+        offline=CONFIG["OFFLINE"],
+    )
+
+def build_fetcher(driver: "webdriver.Chrome", backend: Optional[str] = None, limiter: Optional[RateLimiter] = None, cache: Optional[PageCache] = None, drivers: Optional[DriverPool] = None):
+    backend = backend or CONFIG["FETCH_BACKEND"]
+    http = HttpFetcher(timeout=CONFIG["HTTP_TIMEOUT"], pool_size=CONFIG["HTTP_POOL_SIZE"], limiter=limiter, cache=cache)
+    if cache and cache.offline:
+        return http
+    browser = SeleniumFetcher(driver, ready_xpath=XPATHS["OFFER_TITLE"], ready_timeout=CONFIG["PAGE_READY_TIMEOUT"], limiter=limiter, watchdog=drivers)
+    if backend == "selenium":
+        return browser
+    if backend == "http":
+        return FallbackFetcher(
+            http,
+            browser,
+            ready_xpath=XPATHS["OFFER_TITLE"],
+        )
+    raise ValueError(f"Unknown fetch backend: {backend}")
+
+def parse_watched(parser: Parser, link: str, drivers: Optional[DriverPool] = None, limiter: Optional[RateLimiter] = None, cache: Optional[PageCache] = None) -> Tuple[Parser, List]:
+    """Parse one listing under the driver pool's watchdog.
+
+    When the browser fails on the page, or the pool says the session is worn out,
+    the driver is restarted and the parser rebuilt on it; a listing that failed
+    is re-queued once on the fresh browser. Returns the parser to keep using and
+    the parsed records.
+    """
+    records = []
+    for attempt in range(2):
+        error = None
+        try:
+            parser.parse_page(link)
+        except Exception as e:
+            error = e
+        records.extend(parser.pop_rows())
+        if drivers is None or parser.driver is None:
+            if error:
+                logger.error(f"Error parsing page {link}: {error}")
+            return parser, records
+        reason = "browser error" if error else drivers.recycle_reason(parser.driver)
+        if reason:
+            driver = drivers.recycle(parser.driver, reason)
+            parser = type(parser)(driver, build_fetcher(driver, limiter=limiter, cache=cache, drivers=drivers))
+        if error is None:
+            return parser, records
+        if attempt == 0:
+            logger.warning(f"Browser failed on {link} ({error}), retrying it on a fresh session")
+    logger.error(f"Error parsing page {link} after a browser restart: {error}")
+    return parser, records
+
+def select_category(driver: "webdriver.Chrome", action: str, category: str, limiter: Optional[RateLimiter] = None) -> Optional[str]:
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import Select, WebDriverWait
+    browser_get(driver, CONFIG["SITE_URL"], limiter)
     try:
         WebDriverWait(driver, 5).until(
             EC.presence_of_element_located((By.CLASS_NAME, "category-type"))
@@ -792,7 +715,10 @@ def select_category(driver: webdriver.Chrome, action: str, category: str) -> Opt
         logger.error(f"Error selecting category ({action}, {category}): {e}")
         return None
 
-def get_links(driver: webdriver.Chrome) -> List[str]:
+def get_links(driver: "webdriver.Chrome") -> List[str]:
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
     try:
         divs = WebDriverWait(driver, 10).until(
             EC.presence_of_all_elements_located((By.CLASS_NAME, "a-card__header-left"))
@@ -802,6 +728,317 @@ def get_links(driver: webdriver.Chrome) -> List[str]:
         logger.error(f"Error extracting links: {e}")
         return []
 
+def get_cards(driver: "webdriver.Chrome") -> List[Tuple[str, Optional[str]]]:
+    try:
+        return cards_from_html(driver.current_url, driver.page_source)
+    except Exception as e:
+        logger.error(f"Error extracting cards: {e}")
+        return []
+
+def iter_result_pages(driver: "webdriver.Chrome", base_url: str, page_count: int, limiter: Optional[RateLimiter] = None, state: Optional[CrawlState] = None) -> Iterator[Tuple[int, List[str]]]:
+    for page in range(1, page_count + 1):
+        if state and state.is_page_done(page):
+            logger.info(f"Skipping page {page}: already done")
+            continue
+        page_url = f"{base_url}page={page}"
+        logger.info(f"Processing page {page}: {page_url}" + (f" at {limiter.describe()}" if isinstance(limiter, AdaptiveRateLimiter) else ""))
+
+        try:
+            browser_get(driver, page_url, limiter)
+            wait_until_ready(driver, XPATHS["CARD_LINK"], CONFIG["PAGE_READY_TIMEOUT"])
+            cards = get_cards(driver)
+        except Exception as e:
+            logger.error(f"Error processing page {page}: {e}")
+            print(f"Error processing page {page}: {e}")
+            continue
+
+        if not cards:
+            logger.warning(f"No listings found on page {page}, stopping pagination")
+            print(f"No listings found on page {page}")
+            break
+
+        links = [link for link, _ in cards]
+        logger.info(f"Found {len(links)} listings on page {page}")
+        print(f"Found {len(links)} listings on page {page}")
+        if state:
+            links = state.add_page(page, links, {link: card for link, card in cards if card})
+            if not links:
+                logger.info(f"All listings on page {page} already parsed or unchanged")
+                continue
+        yield page, links
+
+class ResultPagePrefetcher:
+    """Walks result pages over plain HTTP on a background thread, staying up to `depth` pages ahead.
+
+    Iterating yields (page, links) like iter_result_pages, but the next pages are
+    already downloaded while the current batch is being parsed. Pagination stops at
+    the first page without listing cards instead of walking on to `page_count`.
+    """
+
+    def __init__(self, base_url: str, page_count: int, depth: Optional[int] = None, limiter: Optional[RateLimiter] = None, state: Optional[CrawlState] = None, fetcher: Optional[HttpFetcher] = None, cache: Optional[PageCache] = None):
+        self.base_url = base_url
+        self.page_count = page_count
+        self.limiter = limiter
+        self.state = state
+        self.fetcher = fetcher or HttpFetcher(timeout=CONFIG["HTTP_TIMEOUT"], pool_size=1, limiter=limiter, cache=cache)
+        self.pages: queue.Queue = queue.Queue(maxsize=max(depth or CONFIG["PREFETCH_PAGES"], 1))
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="krisha-paginator", daemon=True)
+
+    def __enter__(self) -> "ResultPagePrefetcher":
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[Tuple[int, List[str]]]:
+        while True:
+            item = self.pages.get()
+            if item is None:
+                return
+            yield item
+
+    def close(self) -> None:
+        self.stopped.set()
+        while True:
+            try:
+                self.pages.get_nowait()
+            except queue.Empty:
+                break
+        self.thread.join()
+        self.fetcher.close()
+
+    def _put(self, item) -> bool:
+        while not self.stopped.is_set():
+            try:
+                self.pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self) -> None:
+        try:
+            for page in range(1, self.page_count + 1):
+                if self.stopped.is_set():
+                    return
+                if self.state and self.state.is_page_done(page):
+                    logger.info(f"Skipping page {page}: already done")
+                    continue
+                page_url = f"{self.base_url}page={page}"
+                logger.info(f"Prefetching page {page}: {page_url}" + (f" at {self.limiter.describe()}" if isinstance(self.limiter, AdaptiveRateLimiter) else ""))
+                try:
+                    cards = cards_from_html(page_url, self.fetcher.get(page_url))
+                except Exception as e:
+                    logger.error(f"Error processing page {page}: {e}")
+                    print(f"Error processing page {page}: {e}")
+                    continue
+
+                if not cards:
+                    logger.warning(f"No listings found on page {page}, stopping pagination")
+                    print(f"No listings found on page {page}")
+                    break
+
+                links = [link for link, _ in cards]
+                logger.info(f"Found {len(links)} listings on page {page}")
+                print(f"Found {len(links)} listings on page {page}")
+                if self.state:
+                    links = self.state.add_page(page, links, {link: card for link, card in cards if card})
+                    if not links:
+                        logger.info(f"All listings on page {page} already parsed or unchanged")
+                        continue
+                if not self._put((page, links)):
+                    return
+        finally:
+            self._put(None)
+
+def result_pages(driver: Optional["webdriver.Chrome"], base_url: str, page_count: int, limiter: Optional[RateLimiter] = None, state: Optional[CrawlState] = None, cache: Optional[PageCache] = None):
+    """Prefetching HTTP paginator when CONFIG["PREFETCH_PAGES"] is set (or there is no browser), otherwise the in-browser one."""
+    if CONFIG["PREFETCH_PAGES"] or driver is None:
+        return ResultPagePrefetcher(base_url, page_count, limiter=limiter, state=state, cache=cache)
+    return nullcontext(iter_result_pages(driver, base_url, page_count, limiter, state))
+
+class ListingWorkerPool:
+    """N browsers, each owned by its own thread, parsing listings from a shared queue.
+
+    Parsed rows go to a single writer thread that feeds them to the StreamingWriter.
+    All workers share one rate limiter, so the total request rate stays bounded
+    no matter how many browsers are running.
+    """
+
+    def __init__(self, parser_class, writer: StreamingWriter, workers: Optional[int] = None, limiter: Optional[RateLimiter] = None, cache: Optional[PageCache] = None, drivers: Optional[DriverPool] = None):
+        self.parser_class = parser_class
+        self.drivers = drivers
+        self.cache = cache
+        self.writer = writer
+        self.workers = workers or CONFIG["WORKERS"]
+        self.limiter = limiter or build_limiter()
+        self.links: queue.Queue = queue.Queue(maxsize=self.workers * CONFIG["AVG_NUM_OF_ADS"])
+        self.rows: queue.Queue = queue.Queue()
+        self.worker_threads: List[threading.Thread] = []
+        self.writer_thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "ListingWorkerPool":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close(cancel=exc_type is not None)
+
+    def start(self) -> None:
+        self.writer_thread = threading.Thread(target=self._write, name="krisha-writer", daemon=True)
+        self.writer_thread.start()
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"krisha-worker-{n + 1}", daemon=True)
+            thread.start()
+            self.worker_threads.append(thread)
+
+    def submit(self, link: str) -> None:
+        while True:
+            if not any(thread.is_alive() for thread in self.worker_threads):
+                raise RuntimeError("All listing workers have stopped")
+            try:
+                self.links.put(link, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def close(self, cancel: bool = False) -> None:
+        if cancel:
+            while True:
+                try:
+                    self.links.get_nowait()
+                except queue.Empty:
+                    break
+        for thread in self.worker_threads:
+            if thread.is_alive():
+                self.links.put(None)
+        for thread in self.worker_threads:
+            thread.join()
+        self.rows.put(None)
+        if self.writer_thread:
+            self.writer_thread.join()
+
+    def _work(self) -> None:
+        try:
+            if self.cache and self.cache.offline:
+                session = nullcontext()
+            else:
+                session = self.drivers.session() if self.drivers else init_driver()
+            with session as driver:
+                parser = self.parser_class(driver, build_fetcher(driver, limiter=self.limiter, cache=self.cache, drivers=self.drivers))
+                while True:
+                    link = self.links.get()
+                    if link is None:
+                        break
+                    logger.info(f"Parsing listing: {link}")
+                    parser, records = parse_watched(parser, link, self.drivers, self.limiter, self.cache)
+                    for record in records:
+                        self.rows.put(record)
+        except Exception as e:
+            logger.error(f"Worker {threading.current_thread().name} stopped: {e}")
+
+    def _write(self) -> None:
+        while True:
+            record = self.rows.get()
+            if record is None:
+                break
+            self.writer.add(record)
+        if len(self.writer):
+            self.writer.flush()
+            logger.info("Final data saved")
+
+async def crawl_async(parser_class, base_url: str, page_count: int, writer: StreamingWriter, concurrency: Optional[int] = None, state: Optional[CrawlState] = None, limiter: Optional[RateLimiter] = None, cache: Optional[PageCache] = None) -> None:
+    """Fetch result and listing pages over aiohttp, parse in a thread pool, stream rows to one writer."""
+    import asyncio
+    import aiohttp
+    concurrency = concurrency or CONFIG["ASYNC_CONCURRENCY"]
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    pages: asyncio.Queue = asyncio.Queue()
+    rows: asyncio.Queue = asyncio.Queue(maxsize=concurrency * CONFIG["AVG_NUM_OF_ADS"])
+    for page in range(1, page_count + 1):
+        if state and state.is_page_done(page):
+            continue
+        pages.put_nowait(page)
+
+    timeout = aiohttp.ClientTimeout(total=CONFIG["HTTP_TIMEOUT"])
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(headers=DEFAULT_HEADERS, timeout=timeout, connector=connector) as session:
+
+        async def fetch(url: str) -> str:
+            if cache:
+                source = cache.get(url)
+                if source is not None:
+                    return source
+            async with semaphore:
+                if limiter:
+                    await asyncio.sleep(limiter.reserve())
+                started = time.perf_counter()
+                async with session.get(url) as response:
+                    text = await response.text()
+                    blocked = looks_blocked(str(response.url), text)
+                    if limiter:
+                        limiter.record(time.perf_counter() - started, response.status, blocked)
+                    response.raise_for_status()
+                    if cache and not blocked:
+                        cache.put(url, text)
+                    return text
+
+        async def crawl_listing(link: str) -> None:
+            try:
+                source = await fetch(link)
+                row = await loop.run_in_executor(None, parse_listing_html, parser_class, link, source)
+                await rows.put(row)
+            except Exception as e:
+                logger.error(f"Error parsing page {link}: {e}")
+
+        last_page = page_count
+
+        async def crawl_pages() -> None:
+            nonlocal last_page
+            while not pages.empty():
+                page = pages.get_nowait()
+                if page > last_page:
+                    continue
+                page_url = f"{base_url}page={page}"
+                logger.info(f"Processing page {page}: {page_url}")
+                try:
+                    source = await fetch(page_url)
+                    cards = await loop.run_in_executor(None, cards_from_html, page_url, source)
+                except Exception as e:
+                    logger.error(f"Error processing page {page}: {e}")
+                    continue
+                if not cards:
+                    logger.warning(f"No listings found on page {page}, stopping pagination")
+                    last_page = min(last_page, page - 1)
+                    continue
+                links = [link for link, _ in cards]
+                logger.info(f"Found {len(links)} listings on page {page}")
+                if state:
+                    links = state.add_page(page, links, {link: card for link, card in cards if card})
+                await asyncio.gather(*(crawl_listing(link) for link in links))
+
+        async def write() -> None:
+            while True:
+                record = await rows.get()
+                if record is None:
+                    break
+                writer.append(record)
+                if writer.full:
+                    await loop.run_in_executor(None, writer.flush)
+            if len(writer):
+                await loop.run_in_executor(None, writer.flush)
+                logger.info("Final data saved")
+
+        writer_task = asyncio.create_task(write())
+        try:
+            await asyncio.gather(*(crawl_pages() for _ in range(concurrency)))
+        finally:
+            await rows.put(None)
+            await writer_task
+
 def get_user_input(method: int) -> Tuple[str, str, int, Optional[int]]:
     action_map = {"1": Action.SELL.value, "2": Action.RENT.value}
     category_map = {"1": Category.APARTMENT.value, "2": Category.COMMERCE.value}
@@ -847,149 +1084,292 @@ def get_parsing_method():
         logger.error(f"Invalid method: {e}")
         raise ValueError("Please enter a valid integer for method")
 
-def main():
-    try:
-        method = get_parsing_method()
-        action, category, save_count, page_count = get_user_input(method)
-
-        parser_map = {
-            (Action.SELL.value, Category.APARTMENT.value): AppartmentSellParser,
-            (Action.SELL.value, Category.COMMERCE.value): CommerceSellParser,
-            (Action.RENT.value, Category.APARTMENT.value): AppartmentRentParser,
-            (Action.RENT.value, Category.COMMERCE.value): CommerceRentParser,
-        }
-
-        parser_class = parser_map.get((action, category))
-        if not parser_class:
-            logger.error(f"Invalid action or category: {action}, {category}")
-            print(f"Invalid action or category: {action}, {category}")
+def prompt_links() -> Iterator[str]:
+    """Result-page links typed in the console, until the user enters 1."""
+    while True:
+        page_link = input("Введите ссылку или 1 для закрытия программы: ").strip()
+        if page_link == "1":
             return
+        if not page_link:
+            logger.error("Empty URL provided")
+            print("Ошибка: Ссылка не может быть пустой")
+            continue
+        yield page_link
 
-        output_file = f"{action}_{'apartments' if category == Category.APARTMENT.value else 'commerce'}.csv"
-
-        with init_driver() as driver:
-            parser = None
-
-            if method == 1:
-                save_count = min(save_count, CONFIG["AVG_NUM_OF_ADS"] * page_count)
-                main_url = select_category(driver, action, category)
-                if not main_url:
-                    logger.error("Failed to select category")
-                    print("Failed to select category")
-                    return
-
-                base_url = CONFIG["BASE_URLS"].get((action, category))
-                if not base_url:
-                    logger.error(f"No base URL for action: {action}, category: {category}")
-                    print(f"No base URL for action: {action}, category: {category}")
-                    return
-
-                parser = parser_class(driver)
-                page_count = min(page_count, CONFIG["MAX_PAGES"])
-                logger.info(f"Processing {page_count} pages (max: {CONFIG['MAX_PAGES']})")
-
-                for page in range(1, page_count + 1):
-                    page_url = f"{base_url}page={page}"
-                    logger.info(f"Processing page {page}: {page_url}")
-                    driver.get(page_url)
-
-                    try:
-                        WebDriverWait(driver, 2).until(
-                            EC.presence_of_all_elements_located((By.CLASS_NAME, "a-card__header-left"))
-                        )
-                        links = get_links(driver)
-                        if not links:
-                            logger.warning(f"No listings found on page {page}")
-                            print(f"No listings found on page {page}")
-                            continue
-
-                        logger.info(f"Found {len(links)} listings on page {page}")
-                        print(f"Found {len(links)} listings on page {page}")
-
-                        i = 0
+def valid_result_url(link: str) -> bool:
+    try:
+        parsed_url = urllib.parse.urlparse(link)
+    except ValueError:
+        return False
+    return parsed_url.scheme == "https" and parsed_url.netloc == "krisha.kz"
+
+def load_spec(path: str) -> Dict:
+    """Read a job spec or crawl plan from JSON, or from YAML when the file ends in .yaml/.yml (needs PyYAML)."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    if not isinstance(spec, dict):
+        raise ValueError(f"{path}: expected a mapping at the top level")
+    return spec
+
+def apply_config(overrides: Dict) -> None:
+    """Override CONFIG entries for this process; a misspelt key is an error rather than silently ignored."""
+    if "BASE_URLS" in overrides:
+        raise ValueError("BASE_URLS cannot be overridden, give the job a base_url instead")
+    unknown = [key for key in overrides if key not in CONFIG]
+    if unknown:
+        raise ValueError(f"Unknown CONFIG keys: {unknown}")
+    CONFIG.update(overrides)
+
+def make_job(entry: Dict) -> Dict:
+    """Validate one job and fill in its defaults from CONFIG.
+
+    A job walks `pages` result pages of its action/category, or parses the
+    listings of the given result-page `urls` instead, and writes them to its own
+    `output` in `format`.
+    """
+    unknown = set(entry) - set(JOB_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown job keys: {sorted(unknown)}")
+    job = dict(entry)
+    job["action"], job["category"] = str(job.get("action", "")).lower(), str(job.get("category", ""))
+    if (job["action"], job["category"]) not in PARSER_MAP:
+        raise ValueError(f"Invalid action or category: {job['action']}, {job['category']}")
+    job["format"] = job.get("format") or CONFIG["OUTPUT_FORMAT"]
+    if job["format"] not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {job['format']}")
+    job["output"] = job.get("output") or output_name(job["action"], job["category"], job["format"])
+    job["crawl_mode"] = job.get("crawl_mode") or CONFIG["CRAWL_MODE"]
+    if job["crawl_mode"] not in ("browser", "async"):
+        raise ValueError(f"Unknown crawl mode: {job['crawl_mode']}")
+    if isinstance(job.get("urls"), str):
+        job["urls"] = [job["urls"]]
+    defaults = {"pages": CONFIG["MAX_PAGES"], "save_count": CONFIG["SAVE_COUNT"], "workers": CONFIG["WORKERS"]}
+    for key, default in defaults.items():
+        job[key] = int(default if job.get(key) is None else job[key])
+        if job[key] < 1:
+            raise ValueError(f"{key} must be greater than 0")
+    return job
+
+def crawl_pages(parser_class, base_url: str, page_count: int, writer: StreamingWriter, state: CrawlState, drivers: Optional[DriverPool] = None, limiter: Optional[RateLimiter] = None, cache: Optional[PageCache] = None, workers: int = 1) -> None:
+    """Walk the result pages of one category and parse every listing on them that still has to be crawled.
+
+    A browser is only taken for the result pages when they are paginated in it;
+    prefetched pages come over HTTP and leave every pool slot to the listings.
+    """
+    browser_pages = drivers is not None and not CONFIG["PREFETCH_PAGES"]
+    with (drivers.session() if browser_pages else nullcontext()) as driver:
+        if workers > 1:
+            logger.info(f"Starting {workers} listing workers")
+            with ListingWorkerPool(parser_class, writer, workers=workers, limiter=limiter, cache=cache, drivers=drivers) as pool:
+                with result_pages(driver, base_url, page_count, limiter, state, cache) as pages:
+                    for page, links in pages:
+                        for link in links:
+                            pool.submit(link)
+        else:
+            # the in-browser paginator shares its session with the listings and keeps using it,
+            # so the session can only be restarted when pages come over HTTP
+            with (drivers.session() if drivers and not browser_pages else nullcontext(driver)) as listing_driver:
+                parser = parser_class(listing_driver, build_fetcher(listing_driver, limiter=limiter, cache=cache, drivers=drivers))
+                watchdog = None if browser_pages else drivers
+                with result_pages(driver, base_url, page_count, limiter, state, cache) as pages:
+                    for page, links in pages:
                         for link in links:
                             logger.info(f"Parsing listing: {link}")
-                            parser.parse_page(link)
-                            i += 1
-                            time.sleep(random.uniform(0.5, 1.5))
-
-                            if i >= save_count:
-                                parser.resize()
-                                parser.save_to_csv(output_file)
-                                parser.clear_data()
-                                i = 0
-
-                    except Exception as e:
-                        logger.error(f"Error processing page {page}: {e}")
-                        print(f"Error processing page {page}: {e}")
-
-            elif method == 2:
-                save_count = min(save_count, CONFIG["AVG_NUM_OF_ADS"])
-                parser = parser_class(driver)
-
-                while True:
-                    page_link = input("Введите ссылку или 1 для закрытия программы: ").strip()
-                    if page_link == "1":
-                        break
-
-                    if not page_link:
-                        logger.error("Empty URL provided")
-                        print("Ошибка: Ссылка не может быть пустой")
-                        continue
-
-                    try:
-                        parsed_url = urllib.parse.urlparse(page_link)
-                        if parsed_url.scheme != "https" or parsed_url.netloc != "krisha.kz":
-                            logger.error(f"Invalid URL: {page_link}")
-                            print("Ошибка: Введите корректную ссылку на https://krisha.kz/")
-                            continue
-                    except ValueError:
-                        logger.error(f"Invalid URL format: {page_link}")
-                        print("Ошибка: Неверный формат ссылки")
-                        continue
-
-                    driver.get(page_link)
-                    driver.implicitly_wait(2)
-
-                    links = get_links(driver)
-                    if not links:
-                        logger.warning(f"No listings found on page {page_link}")
-                        print(f"No listings found on page {page_link}")
-                        continue
+                            parser, records = parse_watched(parser, link, watchdog, limiter, cache)
+                            writer.extend(records)
+
+def crawl_links(parser_class, urls: Iterable[str], writer: StreamingWriter, state: CrawlState, drivers: Optional[DriverPool] = None, limiter: Optional[RateLimiter] = None, cache: Optional[PageCache] = None) -> None:
+    """Parse the listings of each given result-page link; `urls` may be read lazily, e.g. from the console."""
+    with (drivers.session() if drivers else nullcontext()) as driver:
+        parser = parser_class(driver, build_fetcher(driver, limiter=limiter, cache=cache, drivers=drivers))
+        for page_link in urls:
+            if not valid_result_url(page_link):
+                logger.error(f"Invalid URL: {page_link}")
+                print("Ошибка: Введите корректную ссылку на https://krisha.kz/")
+                continue
 
-                    logger.info(f"Found {len(links)} listings on page {page_link}")
-                    print(f"Found {len(links)} listings on page {page_link}")
-
-                    i = 0
-                    for link in links:
-                        logger.info(f"Parsing listing: {link}")
-                        parser.parse_page(link)
-                        i += 1
-                        time.sleep(random.uniform(0.5, 1.5))
-
-                        if i >= save_count:
-                            parser.resize()
-                            parser.save_to_csv(output_file)
-                            parser.clear_data()
-                            i = 0
-
-            if parser and any(parser.data.values()):
-                parser.resize()
-                parser.save_to_csv(output_file)
+            if parser.driver:
+                browser_get(parser.driver, page_link, limiter)
+                wait_until_ready(parser.driver, XPATHS["CARD_LINK"], CONFIG["PAGE_READY_TIMEOUT"])
+                links = get_links(parser.driver)
+            else:
+                try:
+                    links = links_from_html(page_link, parser.fetcher.get(page_link))
+                except CacheMiss as e:
+                    logger.error(str(e))
+                    print(f"Ошибка: страницы нет в кэше: {page_link}")
+                    continue
+            if not links:
+                logger.warning(f"No listings found on page {page_link}")
+                print(f"No listings found on page {page_link}")
+                continue
+            links = [link for link in links if not state.is_parsed(link)]
+
+            logger.info(f"Found {len(links)} listings on page {page_link}")
+            print(f"Found {len(links)} listings on page {page_link}")
+
+            for link in links:
+                logger.info(f"Parsing listing: {link}")
+                parser, records = parse_watched(parser, link, drivers, limiter, cache)
+                writer.extend(records)
+
+def run_job(job: Dict, drivers: Optional[DriverPool], limiter: RateLimiter, cache: Optional[PageCache] = None) -> int:
+    """Crawl one job from make_job into its own output with the run's shared browsers; returns the listings written."""
+    action, category, output_file = job["action"], job["category"], job["output"]
+    parser_class = PARSER_MAP[(action, category)]
+    offline = bool(cache and cache.offline)
+    urls = job.get("urls")
+    if urls is None:
+        page_count = min(job["pages"], CONFIG["MAX_PAGES"])
+        save_count = min(job["save_count"], CONFIG["AVG_NUM_OF_ADS"] * page_count)
+    else:
+        save_count = min(job["save_count"], CONFIG["AVG_NUM_OF_ADS"])
+
+    sink = build_sink(output_file, parser_class.RECORD, job["format"])
+    state = CrawlState(CONFIG["STATE_DB"], f"{output_file}:offline" if offline else output_file, incremental=incremental_crawl(job["format"]))
+    try:
+        if offline or not CONFIG["RESUME"]:
+            state.reset()
+        state.begin_run()
+        writer = StreamingWriter(sink, parser_class.row_buffer(), state, save_count, CONFIG["FLUSH_MAX_BYTES"])
+        try:
+            if urls is not None:
+                crawl_links(parser_class, urls, writer, state, drivers, limiter, cache)
+            else:
+                base_url = job.get("base_url") or CONFIG["BASE_URLS"].get((action, category))
+                if not base_url and drivers:
+                    with drivers.session() as driver:
+                        main_url = select_category(driver, action, category, limiter)
+                    base_url = f"{main_url}{'&' if '?' in main_url else '?'}" if main_url else None
+                if not base_url:
+                    raise ValueError(f"No base URL for action: {action}, category: {category}")
+                if job["crawl_mode"] == "async":
+                    import asyncio
+                    logger.info(f"Processing {page_count} pages asynchronously (concurrency: {CONFIG['ASYNC_CONCURRENCY']})")
+                    asyncio.run(crawl_async(parser_class, base_url, page_count, writer, concurrency=CONFIG["ASYNC_CONCURRENCY"], state=state, limiter=limiter, cache=cache))
+                else:
+                    logger.info(f"Processing {page_count} pages (max: {CONFIG['MAX_PAGES']})")
+                    crawl_pages(parser_class, base_url, page_count, writer, state, drivers, limiter, cache, job["workers"])
+        finally:
+            if len(writer):
+                writer.flush()
                 logger.info(f"Final data saved to {output_file}")
                 print(f"Final data saved to {output_file}")
+        state.finish_run()
+        return writer.written
+    finally:
+        sink.close()
+        state.close()
+
+def close_run(limiter: RateLimiter, drivers: Optional[DriverPool] = None, cache: Optional[PageCache] = None) -> None:
+    """Report the run's request rate, cache and extraction stats, then release the shared browsers and cache."""
+    logger.info(f"Request rate at exit: {limiter.describe()}")
+    if drivers:
+        drivers.close()
+    if cache:
+        logger.info(f"Page cache: {cache.describe()}")
+        cache.close()
+    METRICS.log_summary()
+    if LOCATOR_ORDER is not None:
+        LOCATOR_ORDER.save()
+    if CONFIG["METRICS_FILE"]:
+        METRICS.write_prometheus(CONFIG["METRICS_FILE"])
+
+def run_jobs(jobs: List[Dict]) -> None:
+    """Run jobs one after another in this process, sharing the rate limiter, page cache and warm browser pool.
+
+    A failed job is logged and the next one starts; an interrupt stops the run
+    after the current job's rows are flushed.
+    """
+    load_locator_order()
+    cache = build_cache()
+    offline = bool(cache and cache.offline)
+    if offline:
+        logger.info(f"Offline replay from {cache.path}: {cache.describe()}")
+        print("Офлайн-режим: страницы читаются только из кэша")
+    limiter = build_limiter()
+    browser_jobs = [job for job in jobs if job["crawl_mode"] != "async" or job.get("urls") is not None]
+    drivers = None if offline or not browser_jobs else build_driver_pool(size=max(job["workers"] for job in browser_jobs) + 1)
+    try:
+        for n, job in enumerate(jobs, 1):
+            name = f"Job {n}/{len(jobs)} ({job['action']}/{job['category']})"
+            logger.info(f"{name}: writing to {job['output']}")
+            try:
+                written = run_job(job, drivers, limiter, cache)
+            except Exception as e:
+                logger.error(f"{name} failed: {e}")
+                print(f"{name} failed: {e}")
+                continue
+            logger.info(f"{name}: {written} listings written")
+    finally:
+        close_run(limiter, drivers, cache)
 
+def parse_override(item: str) -> Tuple[str, object]:
+    key, sep, value = item.partition("=")
+    if not sep:
+        raise ValueError(f"Expected KEY=VALUE, got {item!r}")
+    try:
+        return key.strip(), json.loads(value)
+    except ValueError:
+        return key.strip(), value
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    arg_parser = argparse.ArgumentParser(description="Parse krisha.kz listings. Without a job spec or --action/--category the parser asks in the console.")
+    arg_parser.add_argument("--job", help="JSON or YAML job spec: a 'jobs' list run one after another and an optional 'config' block")
+    arg_parser.add_argument("--action", choices=[a.value for a in Action])
+    arg_parser.add_argument("--category", choices=[c.value for c in Category], help="1 = apartments, 59 = commercial property")
+    arg_parser.add_argument("--pages", type=int, help="result pages to walk")
+    arg_parser.add_argument("--url", dest="urls", action="append", help="result-page link to parse instead of walking pages (repeatable)")
+    arg_parser.add_argument("--save-count", type=int, help="listings per flush")
+    arg_parser.add_argument("--format", choices=OUTPUT_FORMATS)
+    arg_parser.add_argument("--output", help="output file (default: <action>_<category>.<format>)")
+    arg_parser.add_argument("--workers", type=int, help="listing workers for every job (CONFIG['WORKERS'])")
+    arg_parser.add_argument("--crawl-mode", choices=["browser", "async"], help="crawl mode for every job (CONFIG['CRAWL_MODE'])")
+    arg_parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE", help="override a CONFIG entry; VALUE is read as JSON when it parses (repeatable)")
+    args = arg_parser.parse_args(argv)
+    job_options = [args.pages, args.urls, args.save_count, args.format, args.output]
+    if any(option is not None for option in job_options) and not (args.action and args.category):
+        arg_parser.error("--pages, --url, --save-count, --format and --output describe a job and need --action and --category")
+    return args
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    configure_logging()
+    try:
+        spec = load_spec(args.job) if args.job else {}
+        overrides = dict(spec.get("config") or {})
+        overrides.update(parse_override(item) for item in args.overrides)
+        if args.workers:
+            overrides["WORKERS"] = args.workers
+        if args.crawl_mode:
+            overrides["CRAWL_MODE"] = args.crawl_mode
+        apply_config(overrides)
+
+        entries = list(spec.get("jobs") or [])
+        if args.action or args.category:
+            entry = {"action": args.action, "category": args.category, "pages": args.pages, "urls": args.urls,
+                     "save_count": args.save_count, "format": args.format, "output": args.output}
+            entries.append({key: value for key, value in entry.items() if value is not None})
+        elif not args.job:
+            method = get_parsing_method()
+            action, category, save_count, page_count = get_user_input(method)
+            entry = {"action": action, "category": category, "save_count": save_count}
+            entry.update({"pages": page_count} if method == 1 else {"urls": prompt_links()})
+            entries.append(entry)
+        if not entries:
+            raise ValueError(f"{args.job}: no jobs to run")
+
+        run_jobs([make_job(entry) for entry in entries])
     except KeyboardInterrupt:
         logger.info("Program interrupted by user")
         print("Program interrupted by user")
-        if parser and any(parser.data.values()):
-            parser.resize()
-            parser.save_to_csv(output_file)
-            logger.info(f"Data saved to {output_file}")
-            print(f"Data saved to {output_file}")
     except Exception as e:
         logger.error(f"Program error: {e}")
         print(f"Program error: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,89 @@
+import json
+import logging
+import os
+import threading
+from typing import Collection, Dict, List, Optional, Sequence
+
+
+logger = logging.getLogger(__name__)
+
+
+class LocatorOrder:
+    """Learns which XPath variant of a multi-locator field hits, per parser, and tries it first.
+
+    Only `interchangeable` fields are reordered: those whose locators are alternative
+    markups of one value. For any other field the first locator that matches in
+    source order decides what the value means (e.g. the house floor count before the
+    "3 из 9" flat floor), so its order is never touched. Locators with equal scores,
+    and those never seen hitting, keep their source order.
+
+    Scores are keyed by the XPath string rather than its position, so editing XPATHS
+    never applies a stale ranking to a different locator. Older hits decay, so a
+    layout change on the site is picked up after a few dozen listings.
+    """
+
+    def __init__(self, path: Optional[str] = None, decay: float = 0.98, interchangeable: Collection[str] = ()):
+        self.path = path
+        self.decay = decay
+        self.interchangeable = frozenset(interchangeable)
+        self.lock = threading.Lock()
+        self.scores: Dict[str, Dict[str, Dict[str, float]]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.scores = json.load(f)
+                logger.info(f"Loaded locator order from {path}")
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not read locator order from {path}: {e}")
+
+    def reorder(self, scope: str, fields: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        with self.lock:
+            learned = self.scores.get(scope, {})
+            ordered = {}
+            for field, xpaths in fields.items():
+                scores = learned.get(field) if field in self.interchangeable else None
+                if scores and len(xpaths) > 1:
+                    xpaths = sorted(xpaths, key=lambda xpath: -scores.get(xpath, 0.0))  # stable: source order breaks ties
+                ordered[field] = xpaths
+            return ordered
+
+    def record(self, scope: str, field: str, xpath: str) -> None:
+        with self.lock:
+            scores = self.scores.setdefault(scope, {}).setdefault(field, {})
+            for key in scores:
+                scores[key] *= self.decay
+            scores[xpath] = scores.get(xpath, 0.0) + 1.0
+
+    def observer(self, scope: str, fields: Dict[str, List[str]], metrics=None) -> "LocatorObserver":
+        return LocatorObserver(self, scope, fields, metrics)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self.lock:
+            data = json.dumps(self.scores, ensure_ascii=False, indent=2)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Locator order saved to {self.path}")
+
+
+class LocatorObserver:
+    """Field lookup observer that feeds hits into a LocatorOrder and forwards everything to metrics.
+
+    `fields` are the locators in source order, so metrics report declared indices
+    whatever order the lookup used.
+    """
+
+    def __init__(self, order: LocatorOrder, scope: str, fields: Dict[str, List[str]], metrics=None):
+        self.order = order
+        self.scope = scope
+        self.fields = fields
+        self.metrics = metrics
+
+    def observe(self, field: str, xpaths: Sequence[str], timings: Sequence[float], matched: Optional[int]) -> None:
+        if matched is not None and len(xpaths) > 1 and field in self.order.interchangeable:
+            self.order.record(self.scope, field, xpaths[matched])
+        if self.metrics is not None:
+            self.metrics.observe(field, xpaths, timings, matched, self.fields.get(field))
@@ -0,0 +1,212 @@
+import bisect
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed bucket bounds, in seconds."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class LocatorStats:
+    def __init__(self, xpath: str, index: int):
+        self.xpath = xpath
+        self.index = index
+        self.hits = 0
+        self.misses = 0
+        self.latency = Histogram()
+
+
+class FieldStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.matched_index: Dict[int, int] = {}
+        self.latency = Histogram()
+        self.locators: Dict[str, LocatorStats] = {}
+
+
+class ExtractionMetrics:
+    """Per-field and per-locator lookup latency, hit/miss counters and which fallback index matched.
+
+    Documents report every field lookup through observe(); one instance is shared
+    by all parsers and worker threads of a run. Locators are tracked by XPath and
+    indices always refer to the field's declared locator order, even when the
+    lookup tried them in a learned order. Browser restarts by the driver pool
+    are counted here too, by reason.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.fields: Dict[str, FieldStats] = {}
+        self.recycles: Dict[str, int] = {}
+
+    def observe(self, field: str, xpaths: Sequence[str], timings: Sequence[float], matched: Optional[int], declared: Optional[Sequence[str]] = None) -> None:
+        """Record one field lookup: `timings` holds one entry per locator tried, `matched` is the index that hit.
+
+        `declared` is the field's locator list in source order when `xpaths` was reordered.
+        """
+        declared = declared or xpaths
+        with self.lock:
+            stats = self.fields.get(field)
+            if stats is None:
+                stats = self.fields[field] = FieldStats()
+            stats.latency.observe(sum(timings))
+            if matched is None:
+                stats.misses += 1
+            else:
+                stats.hits += 1
+                index = declared.index(xpaths[matched])
+                stats.matched_index[index] = stats.matched_index.get(index, 0) + 1
+            for index, seconds in enumerate(timings):
+                xpath = xpaths[index]
+                locator = stats.locators.get(xpath)
+                if locator is None:
+                    locator = stats.locators[xpath] = LocatorStats(xpath, declared.index(xpath))
+                locator.latency.observe(seconds)
+                if index == matched:
+                    locator.hits += 1
+                else:
+                    locator.misses += 1
+
+    def record_recycle(self, reason: str) -> None:
+        with self.lock:
+            self.recycles[reason] = self.recycles.get(reason, 0) + 1
+
+    def reset(self) -> None:
+        with self.lock:
+            self.fields.clear()
+            self.recycles.clear()
+
+    def field_summary(self) -> "pd.DataFrame":
+        import pandas as pd
+        with self.lock:
+            rows = [
+                {
+                    "field": field,
+                    "lookups": stats.latency.count,
+                    "hit_rate": stats.hits / stats.latency.count if stats.latency.count else 0.0,
+                    "mean_ms": stats.latency.mean * 1000,
+                    "total_s": stats.latency.sum,
+                    "matched_index": ", ".join(f"{index}: {count}" for index, count in sorted(stats.matched_index.items())),
+                }
+                for field, stats in self.fields.items()
+            ]
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).set_index("field").sort_values("total_s", ascending=False)
+
+    def locator_summary(self) -> "pd.DataFrame":
+        import pandas as pd
+        with self.lock:
+            rows = [
+                {
+                    "field": field,
+                    "index": locator.index,
+                    "tried": locator.latency.count,
+                    "hits": locator.hits,
+                    "hit_rate": locator.hits / locator.latency.count if locator.latency.count else 0.0,
+                    "mean_ms": locator.latency.mean * 1000,
+                    "xpath": locator.xpath,
+                }
+                for field, stats in self.fields.items()
+                for locator in sorted(stats.locators.values(), key=lambda locator: locator.index)
+            ]
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).set_index(["field", "index"])
+
+    def log_summary(self) -> None:
+        import pandas as pd
+        if self.recycles:
+            logger.info("Browser restarts: " + ", ".join(f"{reason}: {count}" for reason, count in sorted(self.recycles.items())))
+        fields = self.field_summary()
+        if fields.empty:
+            return
+        with pd.option_context("display.width", 200, "display.max_colwidth", 80):
+            logger.info(f"Field extraction summary:\n{fields.round(4).to_string()}")
+            dead = self.locator_summary().query("hits == 0")
+            if not dead.empty:
+                logger.info(f"Locators that never matched:\n{dead[['tried', 'xpath']].to_string()}")
+
+    def to_prometheus(self, prefix: str = "krisha") -> str:
+        lines = []
+
+        def histogram(name: str, help_text: str, series: List[Tuple[str, Histogram]]) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for labels, hist in series:
+                for bound, count in hist.cumulative():
+                    lines.append(f'{prefix}_{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{prefix}_{name}_sum{{{labels}}} {hist.sum}")
+                lines.append(f"{prefix}_{name}_count{{{labels}}} {hist.count}")
+
+        def counter(name: str, help_text: str, series: List[Tuple[str, int]]) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for labels, value in series:
+                lines.append(f"{prefix}_{name}{{{labels}}} {value}")
+
+        with self.lock:
+            fields = sorted(self.fields.items())
+            locators = [
+                (f'field="{field}",index="{locator.index}",xpath="{escape_label(locator.xpath)}"', locator)
+                for field, stats in fields
+                for locator in sorted(stats.locators.values(), key=lambda locator: locator.index)
+            ]
+            histogram("field_lookup_seconds", "Time to resolve a field, all fallback locators included.",
+                      [(f'field="{field}"', stats.latency) for field, stats in fields])
+            counter("field_hits_total", "Field lookups that found an element.", [(f'field="{field}"', stats.hits) for field, stats in fields])
+            counter("field_misses_total", "Field lookups where no locator matched.", [(f'field="{field}"', stats.misses) for field, stats in fields])
+            counter("field_matched_index_total", "Which fallback locator index resolved the field.",
+                    [(f'field="{field}",index="{index}"', count) for field, stats in fields for index, count in sorted(stats.matched_index.items())])
+            histogram("locator_lookup_seconds", "Time spent evaluating a single locator.", [(labels, locator.latency) for labels, locator in locators])
+            counter("locator_hits_total", "Evaluations of a locator that found an element.", [(labels, locator.hits) for labels, locator in locators])
+            counter("locator_misses_total", "Evaluations of a locator that found nothing.", [(labels, locator.misses) for labels, locator in locators])
+            counter("browser_recycles_total", "Browser sessions restarted by the watchdog.",
+                    [(f'reason="{escape_label(reason)}"', count) for reason, count in sorted(self.recycles.items())])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the metrics in Prometheus text format, atomically so a node_exporter textfile collector never reads half a file."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        logger.info(f"Extraction metrics written to {path}")
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
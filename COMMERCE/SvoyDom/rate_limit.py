@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_STATUSES = {403, 429, 503}
+
+
+class RateLimiter:
+    """Token bucket shared between threads: at most `rate` requests per second, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("Rate must be greater than 0")
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token now and return how many seconds the caller must wait before using it."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, latency: float, status: Optional[int] = None, blocked: bool = False) -> None:
+        """Response feedback; a fixed-rate limiter ignores it."""
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """Token bucket whose rate follows the site: additive increase, multiplicative decrease.
+
+    Every fetch path reports its responses through record(). A run of healthy, fast
+    responses raises the rate by `step`; a slow response trims it; a 403/429/503 or
+    a captcha page halves it and pauses all callers with an exponential backoff.
+    """
+
+    def __init__(self, rate: float, min_rate: float = 0.2, max_rate: float = 5.0, step: float = 0.1,
+                 slow_latency: float = 3.0, healthy_streak: int = 10, backoff: float = 5.0, max_backoff: float = 300.0):
+        super().__init__(rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.step = step
+        self.slow_latency = slow_latency
+        self.healthy_streak = healthy_streak
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.healthy = 0
+        self.failures = 0
+        self.paused_until = 0.0
+
+    def reserve(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                self.updated = max(self.updated, now)
+                self.tokens -= 1
+                return self.paused_until - now + max(0.0, -self.tokens / self.rate)
+            self._refill(now)
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def _set_rate(self, rate: float, reason: str) -> None:
+        rate = min(self.max_rate, max(self.min_rate, rate))
+        if rate != self.rate:
+            self._refill(time.monotonic())
+            logger.info(f"Request rate {self.rate:.2f} -> {rate:.2f}/s ({reason})")
+            self.rate = rate
+
+    def record(self, latency: float, status: Optional[int] = None, blocked: bool = False) -> None:
+        with self.lock:
+            if blocked or status in BACKOFF_STATUSES:
+                self.failures += 1
+                self.healthy = 0
+                pause = min(self.max_backoff, self.backoff * 2 ** (self.failures - 1))
+                self.paused_until = max(self.paused_until, time.monotonic() + pause)
+                self.tokens = 0.0
+                self._set_rate(self.rate / 2, f"{'captcha' if blocked else status}, pausing {pause:.1f}s")
+                logger.warning(f"Backing off for {pause:.1f}s after {'a captcha page' if blocked else f'HTTP {status}'}")
+                return
+            if latency > self.slow_latency:
+                self.healthy = 0
+                self._set_rate(self.rate * 0.8, f"slow response {latency:.1f}s")
+                return
+            self.failures = 0
+            self.healthy += 1
+            if self.healthy >= self.healthy_streak:
+                self.healthy = 0
+                self._set_rate(self.rate + self.step, "healthy responses")
+
+    def describe(self) -> str:
+        with self.lock:
+            paused = self.paused_until - time.monotonic()
+            return f"{self.rate:.2f} req/s" + (f", paused for {paused:.0f}s" if paused > 0 else "")
@@ -0,0 +1,204 @@
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING, Callable, ClassVar, Collection, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@dataclass(slots=True)
+class ApartmentSellRecord:
+    """One listing as scraped. Numeric columns hold raw page text (or None) until
+    RowBuffer's `finish` converts the batch; DTYPES and TYPES give their final types."""
+
+    link: str
+    rooms: Optional[str]
+    area: Optional[str]
+    floor: Optional[str]
+    max_floor: Optional[str]
+    floor_category: Optional[str]
+    price_per_square: Optional[str]
+    price: Optional[str]
+    district: Optional[str]
+    address: Optional[str]
+    residential_complex: Optional[str]
+    building_type: Optional[str]
+    year: Optional[str]
+    year_category: Optional[str]
+    condition: Optional[str]
+    ceiling: Optional[str]
+    bathroom: Optional[str]
+    seller: Optional[str]
+
+    COLUMNS: ClassVar[Dict[str, str]] = {
+        "link": "Ссылка",
+        "rooms": "Комнатность",
+        "area": "Площадь",
+        "floor": "Этаж",
+        "max_floor": "Этажность дома",
+        "floor_category": "Этажность категория",
+        "price_per_square": "Ценна за квм",
+        "price": "Стоимость",
+        "district": "Район",
+        "address": "Адрес",
+        "residential_complex": "ЖК",
+        "building_type": "Тип построения",
+        "year": "Год постройки",
+        "year_category": "Год постройки - категория",
+        "condition": "состояние",
+        "ceiling": "потолки",
+        "bathroom": "санузел",
+        "seller": "продавец",
+    }
+    DTYPES: ClassVar[Dict[str, str]] = {
+        "area": "Float64",
+        "floor": "Int64",
+        "max_floor": "Int64",
+        "price_per_square": "Float64",
+        "price": "Int64",
+    }
+    TYPES: ClassVar[Dict[str, str]] = {
+        "area": "float",
+        "price_per_square": "float",
+        "price": "int",
+        "floor": "int",
+        "max_floor": "int",
+        "year": "int",
+        "floor_category": "category",
+        "year_category": "category",
+        "district": "category",
+        "building_type": "category",
+    }
+
+
+@dataclass(slots=True)
+class ApartmentRentRecord(ApartmentSellRecord):
+    COLUMNS: ClassVar[Dict[str, str]] = {**ApartmentSellRecord.COLUMNS, "price": "Ценна"}
+
+
+@dataclass(slots=True)
+class CommerceSellRecord:
+    """One commercial listing as scraped; numeric columns hold raw text like ApartmentSellRecord."""
+
+    link: str
+    area: Optional[str]
+    floors: Optional[str]
+    price_per_square: Optional[str]
+    price: Optional[str]
+    district: Optional[str]
+    address: Optional[str]
+    placement: Optional[str]
+    object_name: Optional[str]
+    year: Optional[str]
+    year_category: Optional[str]
+    condition: Optional[str]
+    ceiling: Optional[str]
+    operating_business: Optional[str]
+    communications: Optional[str]
+    location_line: Optional[str]
+    security: Optional[str]
+    free_layout: Optional[str]
+    entrance: Optional[str]
+    parking: Optional[str]
+    allocated_power: Optional[str]
+    seller: Optional[str]
+
+    COLUMNS: ClassVar[Dict[str, str]] = {
+        "link": "Ссылка",
+        "area": "Площадь",
+        "floors": "Этажность",
+        "price_per_square": "Ценна за квм",
+        "price": "Стоимость",
+        "district": "Район",
+        "address": "Адрес",
+        "placement": "Размещение объекта",
+        "object_name": "Название объекта",
+        "year": "Год постройки",
+        "year_category": "Год постройки - категория",
+        "condition": "состояние",
+        "ceiling": "потолки",
+        "operating_business": "Действующий бизнес",
+        "communications": "коммуникации",
+        "location_line": "Линия домов",
+        "security": "Безопасность",
+        "free_layout": "Свободная планировка",
+        "entrance": "Вход",
+        "parking": "Парковка",
+        "allocated_power": "Выделенная мощность",
+        "seller": "продавец",
+    }
+    DTYPES: ClassVar[Dict[str, str]] = {
+        "area": "Float64",
+        "price_per_square": "Float64",
+        "price": "Int64",
+    }
+    TYPES: ClassVar[Dict[str, str]] = {
+        "area": "float",
+        "price_per_square": "float",
+        "price": "int",
+        "year": "int",
+        "year_category": "category",
+        "district": "category",
+        "placement": "category",
+    }
+
+
+@dataclass(slots=True)
+class CommerceRentRecord(CommerceSellRecord):
+    pass
+
+
+class RowBuffer:
+    """Whole listings are appended as records; columns are only built, with their dtypes, on flush.
+
+    A row is either appended completely or not at all, so columns can never drift
+    out of alignment the way per-field list appends could. Each column is converted
+    once, straight from the records to its final dtype; the `raw` columns still hold
+    page text and are read as strings for `finish`, which cleans the whole batch at once.
+    """
+
+    def __init__(self, record_class, finish: Optional[Callable[["pd.DataFrame"], "pd.DataFrame"]] = None, raw: Collection[str] = ()):
+        self.record_class = record_class
+        self.finish = finish
+        self.raw = frozenset(raw)
+        self.names = [field.name for field in fields(record_class)]
+        self.records: List = []
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def append(self, record) -> None:
+        if not isinstance(record, self.record_class):
+            raise TypeError(f"Expected {self.record_class.__name__}, got {type(record).__name__}")
+        self.records.append(record)
+
+    def extend(self, records) -> None:
+        for record in records:
+            self.append(record)
+
+    def pop_all(self) -> List:
+        records, self.records = self.records, []
+        return records
+
+    def clear(self) -> None:
+        self.records = []
+
+    def column_types(self) -> Dict[str, str]:
+        return {self.record_class.COLUMNS[name]: kind for name, kind in self.record_class.TYPES.items()}
+
+    def to_frame(self) -> "pd.DataFrame":
+        import pandas as pd
+        dtypes = {name: self.record_class.DTYPES.get(name, "string") for name in self.names}
+        frame = pd.DataFrame(
+            {name: pd.array([getattr(record, name) for record in self.records], dtype="string" if name in self.raw else dtypes[name]) for name in self.names},
+            copy=False,
+        )
+        if self.finish is not None:
+            frame = self.finish(frame)
+            for name in self.raw:
+                if frame[name].dtype != dtypes[name]:
+                    frame[name] = frame[name].astype(dtypes[name])
+        frame.columns = [self.record_class.COLUMNS[name] for name in self.names]
+        return frame
@@ -0,0 +1,256 @@
+"""Non-interactive crawl of several krisha categories at once, driven by a plan file.
+
+    python scheduler.py crawl_plan.json
+    python scheduler.py crawl_plan.yaml --workers 6
+
+A plan lists the categories to crawl, each with its own page budget and output:
+
+    {
+      "workers": 4,
+      "config": {"RATE_LIMIT": 2.0, "CACHE_DIR": "http_cache"},
+      "categories": [
+        {"action": "sell", "category": "1", "pages": 50},
+        {"action": "rent", "category": "1", "pages": 20, "save_count": 200},
+        {"action": "sell", "category": "59", "pages": 10, "format": "parquet"},
+        {"action": "rent", "category": "59", "pages": 10, "output": "rent_commerce.sqlite", "format": "sqlite"}
+      ]
+    }
+
+Entries take the same keys as krisha_parser.py job specs, and 'config' overrides
+CONFIG entries for the run. All categories share one rate limiter, page cache and
+browser pool. Result pages are prefetched over HTTP per category, and every worker
+takes its next listing from the category with the largest remaining backlog, so
+the categories finish at about the same time instead of one after another.
+"""
+import argparse
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, nullcontext
+from typing import Dict, List, Optional, Tuple
+
+from crawl_state import CrawlState
+from driver_pool import DriverPool
+from http_cache import PageCache
+from krisha_parser import (
+    CONFIG,
+    PARSER_MAP,
+    ResultPagePrefetcher,
+    build_cache,
+    build_driver_pool,
+    build_fetcher,
+    build_limiter,
+    apply_config,
+    build_sink,
+    close_run,
+    configure_logging,
+    incremental_crawl,
+    load_locator_order,
+    load_spec,
+    make_job,
+    parse_watched,
+)
+from rate_limit import RateLimiter
+from sinks import StreamingWriter
+
+
+logger = logging.getLogger(__name__)
+
+
+def load_plan(path: str) -> Dict:
+    """Read a plan (JSON, or YAML with PyYAML), apply its 'config' block and validate every category as a job."""
+    plan = load_spec(path)
+    if not plan.get("categories"):
+        raise ValueError(f"{path}: a plan needs a non-empty 'categories' list")
+    apply_config(plan.get("config") or {})
+    plan["categories"] = [make_job(entry) for entry in plan["categories"]]
+    if any(entry.get("urls") is not None for entry in plan["categories"]):
+        raise ValueError(f"{path}: the scheduler walks result pages; run 'urls' jobs with krisha_parser.py --job")
+    return plan
+
+
+class CategoryCrawl:
+    """One (action, category) of the plan: its paginator, pending links, writer and crawl state."""
+
+    def __init__(self, action: str, category: str, parser_class, pages: int,
+                 writer: StreamingWriter, state: CrawlState, paginator: ResultPagePrefetcher):
+        self.name = f"{action}/{category}"
+        self.parser_class = parser_class
+        self.pages = pages
+        self.writer = writer
+        self.state = state
+        self.paginator = paginator
+        self.links: deque = deque()
+        self.pages_seen = 0
+        self.paginated = False
+        self.failed: List[str] = []
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.paginated and not self.links
+
+    @property
+    def completed(self) -> bool:
+        """Every page was walked and no worker died on one of this crawl's listings."""
+        return self.finished and not self.failed
+
+    def record_failure(self, link: str) -> None:
+        with self.lock:
+            self.failed.append(link)
+
+    def backlog(self) -> int:
+        """Listings still to crawl: the queued links plus an estimate for the pages not fetched yet."""
+        remaining = 0 if self.paginated else max(self.pages - self.pages_seen, 0)
+        return len(self.links) + remaining * CONFIG["AVG_NUM_OF_ADS"]
+
+    def next_link(self) -> Optional[str]:
+        """The next link to parse, taking a prefetched page if needed; None when nothing is ready yet."""
+        with self.lock:
+            while not self.links and not self.paginated:
+                try:
+                    item = self.paginator.pages.get_nowait()
+                except queue.Empty:
+                    return None
+                if item is None:
+                    self.paginated = True
+                    break
+                self.pages_seen += 1
+                self.links.extend(item[1])
+            return self.links.popleft() if self.links else None
+
+    def write(self, records: List) -> None:
+        with self.write_lock:
+            self.writer.extend(records)
+
+
+class CrawlScheduler:
+    """Shares a fixed set of worker threads, each owning one browser, between several category crawls."""
+
+    IDLE_WAIT = 0.2
+
+    def __init__(self, crawls: List[CategoryCrawl], workers: int, drivers: Optional[DriverPool],
+                 limiter: RateLimiter, cache: Optional[PageCache] = None):
+        self.crawls = crawls
+        self.workers = workers
+        self.drivers = drivers
+        self.limiter = limiter
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def next_job(self) -> Optional[Tuple[CategoryCrawl, str]]:
+        with self.lock:
+            for crawl in sorted(self.crawls, key=lambda crawl: crawl.backlog(), reverse=True):
+                link = crawl.next_link()
+                if link is not None:
+                    return crawl, link
+        return None
+
+    def run(self) -> None:
+        threads = [threading.Thread(target=self._work, name=f"krisha-worker-{n + 1}", daemon=True) for n in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            logger.info("Scheduler interrupted, waiting for workers to finish their listing")
+            self.stopped.set()
+            for thread in threads:
+                thread.join()
+            raise
+
+    def _work(self) -> None:
+        """Parse listings until every crawl is done; a crash is recorded on the crawl whose listing was in hand."""
+        session = self.drivers.session() if self.drivers else nullcontext()
+        job = None
+        try:
+            with session as driver:
+                parsers: Dict[type, object] = {}
+                while not self.stopped.is_set():
+                    job = self.next_job()
+                    if job is None:
+                        if all(crawl.finished for crawl in self.crawls):
+                            break
+                        time.sleep(self.IDLE_WAIT)
+                        continue
+                    crawl, link = job
+                    parser = parsers.get(crawl.parser_class)
+                    if parser is None:
+                        parser = crawl.parser_class(driver, build_fetcher(driver, limiter=self.limiter, cache=self.cache, drivers=self.drivers))
+                    logger.info(f"Parsing listing ({crawl.name}): {link}")
+                    parser, records = parse_watched(parser, link, self.drivers, self.limiter, self.cache)
+                    if parser.driver is not driver:
+                        driver = parser.driver
+                        parsers = {}
+                    parsers[crawl.parser_class] = parser
+                    crawl.write(records)
+                    job = None
+        except Exception as e:
+            logger.error(f"Worker {threading.current_thread().name} stopped: {e}")
+            if job is not None:
+                crawl, link = job
+                crawl.record_failure(link)
+
+
+def run_plan(plan: Dict, workers: Optional[int] = None) -> None:
+    workers = workers or plan.get("workers") or CONFIG["WORKERS"]
+    load_locator_order()
+    cache = build_cache()
+    offline = bool(cache and cache.offline)
+    limiter = build_limiter()
+    drivers = None if offline else build_driver_pool(size=workers)
+    crawls: List[CategoryCrawl] = []
+    try:
+        with ExitStack() as stack:
+            for entry in plan["categories"]:
+                action, category, output_file = entry["action"], entry["category"], entry["output"]
+                parser_class = PARSER_MAP[(action, category)]
+                pages = min(entry["pages"], CONFIG["MAX_PAGES"])
+                base_url = entry.get("base_url") or CONFIG["BASE_URLS"][(action, category)]
+
+                sink = build_sink(output_file, parser_class.RECORD, entry["format"])
+                stack.callback(sink.close)
+                state = CrawlState(CONFIG["STATE_DB"], f"{output_file}:offline" if offline else output_file, incremental=incremental_crawl(entry["format"]))
+                stack.callback(state.close)
+                if offline or not CONFIG["RESUME"]:
+                    state.reset()
+                state.begin_run()
+                writer = StreamingWriter(sink, parser_class.row_buffer(), state, entry["save_count"], CONFIG["FLUSH_MAX_BYTES"])
+                paginator = stack.enter_context(ResultPagePrefetcher(base_url, pages, limiter=limiter, state=state, cache=cache))
+                crawls.append(CategoryCrawl(action, category, parser_class, pages, writer, state, paginator))
+                logger.info(f"Scheduled {action}/{category}: {pages} pages into {output_file}")
+
+            try:
+                CrawlScheduler(crawls, workers, drivers, limiter, cache).run()
+            finally:
+                saved = [crawl.writer.flush() for crawl in crawls]
+            for crawl, flushed in zip(crawls, saved):
+                if crawl.completed and flushed:
+                    crawl.state.finish_run()
+                    logger.info(f"{crawl.name}: {crawl.writer.written} listings written")
+                else:
+                    logger.warning(f"{crawl.name}: {crawl.writer.written} listings written, crawl incomplete; the next run resumes it")
+    finally:
+        close_run(limiter, drivers, cache)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    arg_parser = argparse.ArgumentParser(description="Crawl several krisha categories at once from a plan file")
+    arg_parser.add_argument("plan", help="JSON or YAML plan with a 'categories' list")
+    arg_parser.add_argument("--workers", type=int, help="listing workers shared by all categories (overrides the plan)")
+    args = arg_parser.parse_args(argv)
+    configure_logging()
+    try:
+        run_plan(load_plan(args.plan), args.workers)
+    except KeyboardInterrupt:
+        print("Program interrupted by user")
+
+
+if __name__ == "__main__":
+    main()
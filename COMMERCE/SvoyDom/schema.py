@@ -0,0 +1,104 @@
+from dataclasses import dataclass, fields as record_fields
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class Column:
+    """One derived value: `name` is computed by `transform` from `sources`.
+
+    A source is either a field key of the schema (raw page text, upper case) or the
+    name of a column defined earlier (lower case). Without a transform the single
+    source is copied as is. Columns that are not record fields are intermediates.
+
+    A batch column is not computed while crawling: the record keeps the raw text
+    of its single field source (or nothing, if it is derived from other columns)
+    and `transform` runs once per flush on whole pandas Series.
+    """
+
+    name: str
+    sources: Tuple[str, ...]
+    transform: Optional[Callable] = None
+    batch: bool = False
+
+
+def column(name: str, *sources: str, transform: Optional[Callable] = None) -> Column:
+    return Column(name, sources, transform)
+
+
+def batch_column(name: str, *sources: str, transform: Callable) -> Column:
+    return Column(name, sources, transform, batch=True)
+
+
+class FieldSchema:
+    """Declarative listing layout: the locators to read and how every record column is derived.
+
+    Compiling the schema groups fields with identical locator lists, so each
+    distinct lookup runs once per page and its text is fanned out to every field
+    (and through them every column) that uses it.
+    """
+
+    def __init__(self, record, fields: Dict[str, List[str]], columns: Sequence[Column]):
+        self.record = record
+        self.fields = {key: list(locators) for key, locators in fields.items()}
+        self.columns = list(columns)
+        self.names = [field.name for field in record_fields(record)]
+
+        known = set(self.fields) | {"link"}
+        batched = set()
+        for col in self.columns:
+            missing = [source for source in col.sources if source not in known]
+            if missing:
+                raise ValueError(f"Column {col.name} uses unknown sources {missing}")
+            if not col.transform and len(col.sources) != 1:
+                raise ValueError(f"Column {col.name} needs a transform to combine {len(col.sources)} sources")
+            if col.batch:
+                if col.name not in self.names:
+                    raise ValueError(f"Batch column {col.name} must be a field of {record.__name__}")
+                if not (len(col.sources) == 1 and col.sources[0] in self.fields) and not set(col.sources) <= set(self.names):
+                    raise ValueError(f"Batch column {col.name} must read one field or only record columns")
+                batched.add(col.name)
+            elif batched & set(col.sources):
+                raise ValueError(f"Column {col.name} is computed per row but reads batch columns")
+            known.add(col.name)
+        self.batched = batched
+        undefined = [name for name in self.names if name not in known]
+        if undefined:
+            raise ValueError(f"{record.__name__} fields without a column: {undefined}")
+
+        self.lookups: Dict[str, List[str]] = {}
+        self.fan_out: Dict[str, List[str]] = {}
+        first_key: Dict[Tuple[str, ...], str] = {}
+        for key, locators in self.fields.items():
+            lookup = first_key.setdefault(tuple(locators), key)
+            if lookup == key:
+                self.lookups[key] = self.fields[key]
+            self.fan_out.setdefault(lookup, []).append(key)
+
+    def expand(self, found: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+        """Values for every field key from the results of the deduplicated lookups."""
+        return {key: found[lookup] for lookup, keys in self.fan_out.items() for key in keys}
+
+    def build(self, link: str, values: Dict[str, Optional[str]]):
+        row = dict(values)
+        row["link"] = link
+        for col in self.columns:
+            args = [row[source] for source in col.sources]
+            if col.batch:
+                row[col.name] = args[0] if col.sources[0] in self.fields else None
+            else:
+                row[col.name] = col.transform(*args) if col.transform else args[0]
+        return self.record(**{name: row[name] for name in self.names})
+
+    def finish(self, frame):
+        """Compute the batch columns of a frame of records, in schema order, replacing their raw text."""
+        for col in self.columns:
+            if col.batch:
+                args = [frame[col.name]] if col.sources[0] in self.fields else [frame[source] for source in col.sources]
+                frame[col.name] = col.transform(*args)
+        return frame
+
+    def derive(self, record=None, fields: Optional[Dict[str, List[str]]] = None, columns: Sequence[Column] = ()) -> "FieldSchema":
+        """A variant of this schema: fields and columns given here replace those with the same key or name."""
+        replaced = {col.name: col for col in columns}
+        merged = [replaced.pop(col.name, col) for col in self.columns] + list(replaced.values())
+        return FieldSchema(record or self.record, {**self.fields, **(fields or {})}, merged)
@@ -0,0 +1,340 @@
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from crawl_state import listing_id
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+
+logger = logging.getLogger(__name__)
+
+
+def arrow_type(kind: str) -> "pa.DataType":
+    """Arrow type of a logical column type; pyarrow is only imported once a Parquet sink writes."""
+    import pyarrow as pa
+    if kind == "float":
+        return pa.float64()
+    if kind == "int":
+        return pa.int64()
+    if kind == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string()
+
+SQL_TYPES = {
+    "float": "DOUBLE",
+    "int": "BIGINT",
+    "category": "VARCHAR",
+    "string": "VARCHAR",
+}
+
+
+def cast_frame(df: "pd.DataFrame", types: Dict[str, str]) -> "pd.DataFrame":
+    """Convert scraped columns to the logical types used by typed sinks (float, int, category, string)."""
+    import pandas as pd
+    columns = {}
+    for column in df.columns:
+        kind = types.get(column, "string")
+        values = df[column]
+        if kind == "float":
+            values = pd.to_numeric(values, errors="coerce").astype("Float64")
+        elif kind == "int":
+            values = pd.to_numeric(values, errors="coerce").astype("Float64").round().astype("Int64")
+        elif kind == "category":
+            values = values.astype("string").astype("category")
+        else:
+            values = values.astype("string")
+        columns[column] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+class CsvSink:
+    """Appends each flush to a text file kept open for the run, writing the header only when the file is new."""
+
+    def __init__(self, filename: str, encoding: str = "utf-16", separator: str = "["):
+        self.filename = filename
+        self.encoding = encoding
+        self.separator = separator
+        self.file = None
+
+    def write(self, df: "pd.DataFrame") -> bool:
+        try:
+            if self.file is None:
+                self.file = open(self.filename, "a", encoding=self.encoding, newline="")
+            df.to_csv(self.file, sep=self.separator, index=False, header=self.file.tell() == 0)
+            logger.info(f"Data saved to {self.filename}")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving to CSV: {e}")
+            return False
+
+    def sync(self) -> None:
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class ParquetSink:
+    """Writes every flush as its own part file with a typed schema.
+
+    `path` is a dataset directory: parts are only ever added to it, so earlier runs
+    are never rewritten and `pd.read_parquet(path)` reads them all. A Parquet file
+    is only readable once its footer is written, so durability is per part: a part
+    is written under a hidden `.inprogress` name that readers skip, and sync()
+    closes, fsyncs and renames it at every checkpoint before the crawl state
+    commits. A crash leaves at most one hidden unfinished part behind.
+    """
+
+    def __init__(self, path: str, types: Optional[Dict[str, str]] = None, compression: str = "zstd"):
+        self.path = path
+        self.types = types or {}
+        self.compression = compression
+        self.writer: Optional["pq.ParquetWriter"] = None
+        self.schema: Optional["pa.Schema"] = None
+        self.part_file: Optional[str] = None
+        self.parts = 0
+
+    @property
+    def pending_file(self) -> str:
+        head, name = os.path.split(self.part_file)
+        return os.path.join(head, f".{name}.inprogress")
+
+    def _open(self, df: "pd.DataFrame") -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        os.makedirs(self.path, exist_ok=True)
+        self.schema = pa.schema(
+            [pa.field(column, arrow_type(self.types.get(column, "string"))) for column in df.columns]
+        )
+        self.parts += 1
+        self.part_file = os.path.join(self.path, f"part-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex}.parquet")
+        self.writer = pq.ParquetWriter(self.pending_file, self.schema, compression=self.compression)
+
+    def write(self, df: "pd.DataFrame") -> bool:
+        import pyarrow as pa
+        try:
+            df = cast_frame(df, self.types)
+            if self.writer is None:
+                self._open(df)
+            table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+            self.writer.write_table(table)
+            logger.info(f"{len(df)} rows saved to {self.part_file}")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving to Parquet: {e}")
+            return False
+
+    def sync(self) -> None:
+        if self.writer is None:
+            return
+        self.writer.close()
+        self.writer = None
+        with open(self.pending_file, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(self.pending_file, self.part_file)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.sync()
+
+
+class DatabaseSink:
+    """Upserts every flush into a SQLite or DuckDB table keyed by the krisha listing ID.
+
+    A listing crawled again overwrites its row instead of adding a duplicate, and
+    whenever its price differs from the stored one the new price is appended to
+    `<table>_price_history`, so price changes can be queried without old snapshots.
+    """
+
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, path: str, table: str, types: Optional[Dict[str, str]] = None,
+                 link_column: str = "Ссылка", price_column: str = "Стоимость", backend: str = "sqlite"):
+        self.path = path
+        self.table = table
+        self.history_table = f"{table}_price_history"
+        self.types = types or {}
+        self.link_column = link_column
+        self.price_column = price_column
+        self.backend = backend
+        if backend == "sqlite":
+            self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=FULL")
+        elif backend == "duckdb":
+            import duckdb
+            self.conn = duckdb.connect(path)
+        else:
+            raise ValueError(f"Unknown database backend: {backend}")
+        self.columns: Optional[List[str]] = None
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def _open(self, columns: List[str]) -> None:
+        definitions = ", ".join(f"{self._quote(column)} {SQL_TYPES[self.types.get(column, 'string')]}" for column in columns)
+        price_type = SQL_TYPES[self.types.get(self.price_column, "string")]
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._quote(self.table)} "
+            f"(listing_id VARCHAR PRIMARY KEY, {definitions}, first_seen DOUBLE, last_seen DOUBLE)"
+        )
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self._quote(self.history_table)} "
+            f"(listing_id VARCHAR, price {price_type}, seen_at DOUBLE)"
+        )
+        existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({self._quote(self.table)})").fetchall()}
+        for column in columns:
+            if column not in existing:
+                self.conn.execute(
+                    f"ALTER TABLE {self._quote(self.table)} ADD COLUMN {self._quote(column)} {SQL_TYPES[self.types.get(column, 'string')]}"
+                )
+        self.columns = columns
+
+    def _stored_prices(self, keys: List[str]) -> Dict[str, object]:
+        prices = {}
+        for start in range(0, len(keys), self.LOOKUP_CHUNK):
+            chunk = keys[start:start + self.LOOKUP_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = self.conn.execute(
+                f"SELECT listing_id, {self._quote(self.price_column)} FROM {self._quote(self.table)} WHERE listing_id IN ({placeholders})",
+                chunk,
+            ).fetchall()
+            prices.update(dict(rows))
+        return prices
+
+    def write(self, df: "pd.DataFrame") -> bool:
+        if df.empty:
+            return True
+        try:
+            df = cast_frame(df, self.types)
+            columns = list(df.columns)
+            if self.columns != columns:
+                self._open(columns)
+            keys = [listing_id(link) for link in df[self.link_column]]
+            values = df.astype(object).where(df.notna(), None).values.tolist()
+            now = time.time()
+
+            names = ", ".join(self._quote(column) for column in columns)
+            placeholders = ", ".join("?" for _ in range(len(columns) + 3))
+            updates = ", ".join(f"{self._quote(column)} = excluded.{self._quote(column)}" for column in columns)
+            upsert = (
+                f"INSERT INTO {self._quote(self.table)} (listing_id, {names}, first_seen, last_seen) VALUES ({placeholders}) "
+                f"ON CONFLICT (listing_id) DO UPDATE SET {updates}, last_seen = excluded.last_seen"
+            )
+            price_index = columns.index(self.price_column) if self.price_column in columns else None
+
+            self.conn.execute("BEGIN")
+            try:
+                history = []
+                if price_index is not None:
+                    stored = self._stored_prices(list(dict.fromkeys(keys)))
+                    for key, row in zip(keys, values):
+                        price = row[price_index]
+                        if price is not None and (key not in stored or stored[key] != price):
+                            history.append((key, price, now))
+                            stored[key] = price
+                rows = {key: (key, *row, now, now) for key, row in zip(keys, values)}
+                self.conn.executemany(upsert, list(rows.values()))
+                if history:
+                    self.conn.executemany(
+                        f"INSERT INTO {self._quote(self.history_table)} (listing_id, price, seen_at) VALUES (?, ?, ?)",
+                        history,
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            logger.info(f"{len(rows)} listings upserted into {self.path}:{self.table} ({len(history)} price changes)")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving to database: {e}")
+            return False
+
+    def sync(self) -> None:
+        """SQLite commits are already durable; DuckDB also folds its WAL into the database file."""
+        if self.backend == "duckdb":
+            self.conn.execute("CHECKPOINT")
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class StreamingWriter:
+    """Buffers parsed records and hands them to a sink in bounded batches.
+
+    A batch is written once it holds `max_rows` records or about `max_bytes` of
+    text, whichever comes first, so memory stays flat however long the crawl runs.
+    After each write the sink is synced to disk and only then is the crawl state
+    committed: a crash loses at most the batch still in memory, and resuming
+    crawls those listings again. A batch the sink fails to write or sync is
+    rolled back in the crawl state the same way, so it is never recorded as parsed.
+    """
+
+    def __init__(self, sink, rows, state=None, max_rows: int = 500, max_bytes: int = 8 * 2 ** 20):
+        self.sink = sink
+        self.rows = rows
+        self.state = state
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.written = 0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def full(self) -> bool:
+        return len(self.rows) >= self.max_rows or self.size >= self.max_bytes
+
+    def append(self, record) -> None:
+        self.rows.append(record)
+        self.size += sum(len(value) for value in (getattr(record, name) for name in self.rows.names) if isinstance(value, str))
+        if self.state:
+            self.state.add_listing(record.link)
+
+    def add(self, record) -> None:
+        self.append(record)
+        if self.full:
+            self.flush()
+
+    def extend(self, records) -> None:
+        for record in records:
+            self.add(record)
+
+    def flush(self) -> bool:
+        if not len(self.rows):
+            return True
+        count = len(self.rows)
+        df = self.rows.to_frame()
+        self.rows.clear()
+        self.size = 0
+        if not self.sink.write(df):
+            self._rollback(count)
+            return False
+        try:
+            self.sink.sync()
+        except OSError as e:
+            logger.error(f"Could not sync output to disk: {e}")
+            self._rollback(count)
+            return False
+        if self.state:
+            self.state.commit()
+        self.written += count
+        return True
+
+    def _rollback(self, count: int) -> None:
+        logger.error(f"Batch of {count} listings was not saved, they will be crawled again on resume")
+        if self.state:
+            self.state.rollback()
@@ -0,0 +1,51 @@
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmark
+import krisha_parser
+from benchmark import FixtureServer
+
+
+def crawl(tmp_path, replace=None):
+    """One default-config job (resume on, incremental off) into a SQLite output over the local fixture site."""
+    load_fixture = benchmark.load_fixture
+    if replace:
+        benchmark.load_fixture = lambda name: load_fixture(name).replace(*replace)
+    try:
+        with FixtureServer() as server:
+            job = krisha_parser.make_job({
+                "action": "sell",
+                "category": "1",
+                "pages": 1,
+                "format": "sqlite",
+                "crawl_mode": "async",
+                "output": str(tmp_path / "prices.sqlite"),
+                "base_url": f"{server.base_url}/apartment_sell/results/?",
+            })
+            krisha_parser.run_jobs([job])
+    finally:
+        benchmark.load_fixture = load_fixture
+
+
+def test_changed_price_is_recorded_on_second_crawl(tmp_path, monkeypatch):
+    monkeypatch.setitem(krisha_parser.CONFIG, "STATE_DB", str(tmp_path / "state.sqlite"))
+    monkeypatch.setitem(krisha_parser.CONFIG, "RATE_LIMIT", 1000.0)
+    monkeypatch.setitem(krisha_parser.CONFIG, "RATE_LIMIT_MAX", 1000.0)
+    monkeypatch.setitem(krisha_parser.CONFIG, "LOCATOR_ORDER_FILE", None)
+
+    crawl(tmp_path)
+    conn = sqlite3.connect(tmp_path / "prices.sqlite")
+    first = conn.execute("SELECT COUNT(*) FROM prices_price_history").fetchone()[0]
+    conn.close()
+    assert first > 0
+
+    crawl(tmp_path, replace=(" 000 000 〒".encode(), " 100 000 〒".encode()))
+    conn = sqlite3.connect(tmp_path / "prices.sqlite")
+    history = conn.execute("SELECT COUNT(*) FROM prices_price_history").fetchone()[0]
+    prices = {row[0] for row in conn.execute('SELECT "Стоимость" FROM prices')}
+    conn.close()
+    assert history == 2 * first
+    assert prices == {35100000}
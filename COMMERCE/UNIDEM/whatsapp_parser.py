@@ -5,6 +5,8 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from contextlib import contextmanager
 import pandas as pd
+import argparse
+import json
 import time
 from pathlib import Path
 
@@ -137,23 +139,43 @@ class WhatsappParser:
         )
 
 
+def check_file_path(path: str) -> Path:
+    if not path:
+        raise ValueError("The file path cannot be empty.")
+    file_path = Path(path)
+    if file_path.exists() and file_path.is_file() and file_path.suffix == ".xlsx":
+        return file_path
+    raise ValueError(
+        f"Invalid file path {path}! Ensure the file exists and has a .xlsx extension."
+    )
+
+
 def validate_file_path(path: str) -> Path:
     while True:
-        if not path:
-            print("The file path cannot be empty.")
-            path = input("Enter the path to the Excel file:\n").strip()
-            continue
-        file_path = Path(path)
-        if file_path.exists() and file_path.is_file() and file_path.suffix == ".xlsx":
-            return file_path
-        print(
-            "Invalid file path! Ensure the file exists and has a .xlsx extension."
-        )
+        try:
+            return check_file_path(path)
+        except ValueError as e:
+            print(e)
         path = input("Enter the path to the Excel file:\n").strip()
 
 
-def load_excel(file_path: str):
+def load_excel(file_path: str, columns: dict = None):
+    """Read the table and its column names; without `columns` they are asked in the console.
+
+    `columns` maps "name", "phone" and optionally "parent" to column headers.
+    """
     df = pd.read_excel(file_path)
+    if columns is not None:
+        available = df.columns.tolist()
+        for key in ("name", "phone", "parent"):
+            if columns.get(key) is not None and columns[key] not in available:
+                raise ValueError(
+                    f"{file_path}: no column {columns[key]!r}, choose from {available}"
+                )
+        if not columns.get("name") or not columns.get("phone"):
+            raise ValueError(f"{file_path}: the name and phone columns are required")
+        return df, columns["name"], columns["phone"], columns.get("parent")
+
     columns = df.columns.tolist()
     print(f"Available columns: {columns}")
 
@@ -239,44 +261,129 @@ def first_enter(driver, timeout=CONFIG["timeouts"]["wait"]):
     time.sleep(2)
 
 
-def main():
-    path = input("Enter the path to the Excel file:\n").strip()
-    df, student_name, student_phone, parent_phone = load_excel(
-        file_path=validate_file_path(path)
-    )
+def log_in(driver):
+    driver.get("https://web.whatsapp.com")
+    wait_qr(driver, by=By.CSS_SELECTOR, value=CONFIG["selectors"]["qr_code"])
+    first_enter(driver)
 
-    with whatsapp_driver() as driver:
-        driver.get("https://web.whatsapp.com")
-        wait_qr(driver, by=By.CSS_SELECTOR, value=CONFIG["selectors"]["qr_code"])
-        first_enter(driver)
-
-        for index, row in df.iterrows():
-            try:
-                print(f"row: {index+1}, process: {row[student_name]}")
-                if pd.isna(row[student_name]) or pd.isna(row[student_phone]):
-                    print(f"Skipping row {index+1}: Missing student name or phone")
+
+def add_contacts(driver, df, student_name, student_phone, parent_phone):
+    """Create a contact for every student (and parent) row; returns how many were saved."""
+    saved = 0
+    for index, row in df.iterrows():
+        try:
+            print(f"row: {index+1}, process: {row[student_name]}")
+            if pd.isna(row[student_name]) or pd.isna(row[student_phone]):
+                print(f"Skipping row {index+1}: Missing student name or phone")
+                continue
+            student_whatsapp_parser = WhatsappParser(
+                driver=driver,
+                name=row[student_name].strip(),
+                phone=normalize_phone(str(row[student_phone])),
+            )
+            saved += student_whatsapp_parser.create_contact()
+            if parent_phone:
+                if pd.isna(row[parent_phone]):
+                    print(f"Skipping row {index+1}: Missing parent phone")
                     continue
-                student_whatsapp_parser = WhatsappParser(
+                parent_whatsapp_parser = WhatsappParser(
                     driver=driver,
-                    name=row[student_name].strip(),
-                    phone=normalize_phone(str(row[student_phone])),
+                    name=f"Parent {row[student_name]}",
+                    phone=normalize_phone(str(row[parent_phone])),
                 )
-                student_whatsapp_parser.create_contact()
-                if parent_phone:
-                    if pd.isna(row[parent_phone]):
-                        print(f"Skipping row {index+1}: Missing parent phone")
-                        continue
-                    parent_whatsapp_parser = WhatsappParser(
-                        driver=driver,
-                        name=f"Parent {row[student_name]}",
-                        phone=normalize_phone(str(row[parent_phone])),
-                    )
-                    parent_whatsapp_parser.create_contact()
-            except (TypeError, ValueError) as e:
-                print(e)
-                continue
+                saved += parent_whatsapp_parser.create_contact()
+        except (TypeError, ValueError) as e:
+            print(e)
+            continue
+    return saved
+
+
+def load_spec(path):
+    """Read a job spec from JSON, or from YAML when the file ends in .yaml/.yml (needs PyYAML)."""
+    with open(path, encoding="utf-8") as f:
+        if str(path).endswith((".yaml", ".yml")):
+            import yaml
+
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    if not isinstance(spec, dict) or not spec.get("jobs"):
+        raise ValueError(f"{path}: a job spec needs a non-empty 'jobs' list")
+    return spec
+
+
+def load_jobs(args):
+    """Tables to process with their column names, from --job and the command line."""
+    jobs = []
+    if args.job:
+        for entry in load_spec(args.job)["jobs"]:
+            columns = {
+                key: entry.get(f"{key}_column") for key in ("name", "phone", "parent")
+            }
+            jobs.append((check_file_path(entry.get("file")), columns))
+    columns = {
+        "name": args.name_column,
+        "phone": args.phone_column,
+        "parent": args.parent_column,
+    }
+    for path in args.files:
+        jobs.append((check_file_path(path), columns))
+    # load every table before the QR code, so a wrong column stops the run right away
+    return [(file_path, *load_excel(file_path, columns)) for file_path, columns in jobs]
+
+
+def run_jobs(tables):
+    """Add the contacts of every table in one WhatsApp Web session (one QR code scan)."""
+    with whatsapp_driver() as driver:
+        log_in(driver)
+        for file_path, df, student_name, student_phone, parent_phone in tables:
+            print(f"Processing {file_path}: {len(df)} rows")
+            saved = add_contacts(driver, df, student_name, student_phone, parent_phone)
+            print(f"{file_path}: {saved} contacts saved")
         print("End parser")
 
 
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Add students and parents from Excel tables to WhatsApp contacts. "
+        "Without files or --job the script asks for the file and columns in the console."
+    )
+    arg_parser.add_argument(
+        "files", nargs="*", help=".xlsx tables that share the column names below"
+    )
+    arg_parser.add_argument("--name-column", help="column with the student's name")
+    arg_parser.add_argument("--phone-column", help="column with the student's phone")
+    arg_parser.add_argument(
+        "--parent-column", help="column with the parent's phone (optional)"
+    )
+    arg_parser.add_argument(
+        "--job",
+        help="JSON or YAML spec with a 'jobs' list of "
+        "{file, name_column, phone_column, parent_column}",
+    )
+    args = arg_parser.parse_args(argv)
+    if args.files and not (args.name_column and args.phone_column):
+        arg_parser.error(
+            "files on the command line need --name-column and --phone-column"
+        )
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.files or args.job:
+        try:
+            tables = load_jobs(args)
+        except (OSError, ValueError) as e:
+            print(e)
+            return
+    else:
+        path = input("Enter the path to the Excel file:\n").strip()
+        file_path = validate_file_path(path)
+        tables = [(file_path, *load_excel(file_path=file_path))]
+
+    run_jobs(tables)
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,6 +6,9 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
+from contextlib import contextmanager
+import argparse
+import json
 import os
 
 
@@ -19,7 +22,6 @@ CONFIG = {
     "NAME": "your_profile_name_on_chess.com",
     "FIND_NAME_CLASS": "user-tagline-username",
     "BUTTON_ARIA_LABEL": "Next Page",
-    "FLAG": True,
     "FLAG_CLOSE": True,
     "BUTTON_CLOSE": "Close",
     "API_ID": "your_api_id",
@@ -27,8 +29,6 @@ CONFIG = {
     "PHONE": 'your_phone',
 }
 
-rating = 0
-rank = 0
 
 def change_bio(BIO_TEXT, client):
     try:
@@ -37,11 +37,21 @@ def change_bio(BIO_TEXT, client):
     except Exception as e:
         return f"Ошибка при изменении био: {e}"
     
-def get_rank_rating():
-    
+@contextmanager
+def chess_driver():
     driver = webdriver.Chrome()
-    driver.get(CONFIG["KZ_LEADERBOARD"])
-    while CONFIG["FLAG"]:
+    try:
+        yield driver
+    finally:
+        driver.quit()
+
+
+def get_rank_rating(driver, name=None, profile=None, leaderboard=None):
+    name = name or CONFIG["NAME"]
+    profile = profile or CONFIG["CHESS_PROFILE"]
+    driver.get(leaderboard or CONFIG["KZ_LEADERBOARD"])
+    close_popup = CONFIG["FLAG_CLOSE"]
+    while True:
         WebDriverWait(driver, 2).until(
             EC.presence_of_element_located((By.CLASS_NAME, CONFIG["MAIN_TR_CLASS"]))
         )
@@ -49,7 +59,7 @@ def get_rank_rating():
         players = driver.find_elements(By.CLASS_NAME, CONFIG["MAIN_TR_CLASS"])
 
         for item in players:
-            if CONFIG["NAME"] in item.text:
+            if name in item.text:
                 rank = int(
                     item.find_element(By.CLASS_NAME, CONFIG["RANK_CLASS"]).text.replace(
                         "#", ""
@@ -59,12 +69,9 @@ def get_rank_rating():
                     By.XPATH, f".//td[contains(@class, '{CONFIG['RATING_CLASS']}')][2]"
                 ).text
                 print("success", rank, rating)
-                print(len(f"{CONFIG["CHESS_PROFILE"]} rank in KZ:{rank}, rating:{rating}"))
-                print(f"{CONFIG["CHESS_PROFILE"]}, rank in KZ:{rank}, rating:{rating}")
-                CONFIG["FLAG"] = False
-                return f"{CONFIG["CHESS_PROFILE"]}, rank in KZ:{rank}, rating:{rating}"
+                return f"{profile}, rank in KZ:{rank}, rating:{rating}"
 
-        if CONFIG["FLAG_CLOSE"] and WebDriverWait(driver, 2).until(
+        if close_popup and WebDriverWait(driver, 2).until(
             EC.element_to_be_clickable(
                 (By.CSS_SELECTOR, f"button[aria-label='{CONFIG['BUTTON_CLOSE']}']")
             )
@@ -73,7 +80,7 @@ def get_rank_rating():
                 By.CSS_SELECTOR, f"button[aria-label='{CONFIG['BUTTON_CLOSE']}']"
             )
             btn_close.click()
-            CONFIG["FLAG_CLOSE"] = False
+            close_popup = False
 
         driver.implicitly_wait(1)
 
@@ -82,15 +89,66 @@ def get_rank_rating():
         )
         btn.click()
 
-    driver.close()
 
+def update_bio(bio):
+    with TelegramClient('chess_parser_1', api_id=CONFIG["API_ID"], api_hash=CONFIG["API_HASH"]) as client:
+        client.sign_in(phone=CONFIG["PHONE"])
+        client.start(phone=CONFIG["PHONE"])
 
+        print(change_bio(bio, client))
 
 
-with TelegramClient('chess_parser_1', api_id=CONFIG["API_ID"], api_hash=CONFIG["API_HASH"]) as client:
-    profile_info = get_rank_rating()
-    client.sign_in(phone=CONFIG["PHONE"])
-    client.start(phone=CONFIG["PHONE"])
-    
-    change_bio(profile_info, client)
-    
\ No newline at end of file
+def load_spec(path):
+    """Read a job spec from JSON, or from YAML when the file ends in .yaml/.yml (needs PyYAML)."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    if not isinstance(spec, dict):
+        raise ValueError(f"{path}: expected a mapping at the top level")
+    return spec
+
+
+def run_jobs(jobs, bio=True):
+    """Look up every profile in one browser session, then put all statuses into the Telegram bio."""
+    with chess_driver() as driver:
+        statuses = [get_rank_rating(driver, **job) for job in jobs]
+    for status in statuses:
+        print(status)
+    if not bio:
+        return
+    text = " | ".join(statuses)
+    if len(text) > CONFIG["MAX_LEN_STATUS"]:
+        print(f"Bio not changed: {len(text)} characters, the limit is {CONFIG['MAX_LEN_STATUS']}")
+        return
+    update_bio(text)
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Put chess.com leaderboard rank and rating into the Telegram bio")
+    arg_parser.add_argument("--job", help="JSON or YAML spec: 'config' overrides CONFIG, 'jobs' lists {name, profile, leaderboard}")
+    arg_parser.add_argument("--name", help="profile name on chess.com (CONFIG['NAME'])")
+    arg_parser.add_argument("--profile", help="profile link shown in the bio (CONFIG['CHESS_PROFILE'])")
+    arg_parser.add_argument("--leaderboard", help="leaderboard URL (CONFIG['KZ_LEADERBOARD'])")
+    arg_parser.add_argument("--no-bio", action="store_true", help="only print the statuses, do not touch Telegram")
+    args = arg_parser.parse_args(argv)
+
+    spec = load_spec(args.job) if args.job else {}
+    unknown = [key for key in spec.get("config", {}) if key not in CONFIG]
+    if unknown:
+        arg_parser.error(f"unknown CONFIG keys in {args.job}: {unknown}")
+    CONFIG.update(spec.get("config", {}))
+
+    jobs = spec.get("jobs") or [{}]
+    for job in jobs:
+        if set(job) - {"name", "profile", "leaderboard"}:
+            arg_parser.error(f"unknown job keys in {args.job}: {sorted(set(job) - {'name', 'profile', 'leaderboard'})}")
+    overrides = {"name": args.name, "profile": args.profile, "leaderboard": args.leaderboard}
+    jobs = [{**job, **{key: value for key, value in overrides.items() if value}} for job in jobs]
+    run_jobs(jobs, bio=not args.no_bio)
+
+
+if __name__ == "__main__":
+    main()